@@ -1,10 +1,12 @@
 import logging
 import sys
+from collections.abc import AsyncIterator
 from typing import Any
 
 from torchlight.FFmpegAudioPlayer import FFmpegAudioPlayer
 from torchlight.Player import Player
 from torchlight.Torchlight import Torchlight
+from torchlight.Utils import Utils
 
 
 class AudioClip:
@@ -40,8 +42,19 @@ class AudioClip:
         volume: float | None = None,
         speed: float | None = None,
         pitch: float | None = None,
+        prebuffer: bytes | None = None,
+        source: bytes | AsyncIterator[bytes] | None = None,
     ) -> bool:
-        return self.audio_player.PlayURI(self.uri, seconds, *args, volume=volume, speed=speed, pitch=pitch)
+        return self.audio_player.PlayURI(
+            self.uri,
+            seconds,
+            *args,
+            volume=volume,
+            speed=speed,
+            pitch=pitch,
+            prebuffer=prebuffer,
+            source=source,
+        )
 
     def Stop(self) -> bool:
         return self.audio_player.Stop()
@@ -56,6 +69,8 @@ class AudioClip:
     def OnStop(self) -> None:
         self.logger.debug(sys._getframe().f_code.co_name + " " + self.uri)
 
+        self.RecordUsage()
+
         if self.audio_player.playing:
             delta = self.audio_player.position - self.last_position
             self.player.storage["Audio"]["TimeUsed"] += delta
@@ -80,6 +95,28 @@ class AudioClip:
 
         del self.audio_player
 
+    def RecordUsage(self) -> None:
+        usage = self.audio_player.usage
+        if not usage:
+            return
+
+        self.logger.info(
+            f'Clip "{self.uri}" by "{self.player.name}"({self.player.unique_id}) '
+            f"[{self.audio_player.source_type} | {self.audio_player.filter_graph}]: "
+            + ", ".join(
+                f"{name} {process_usage.cpu_time:.2f}s cpu / {Utils.HumanSize(process_usage.peak_rss)} peak"
+                for name, process_usage in usage.items()
+            )
+        )
+
+        self.torchlight.process_accounting.Record(
+            player_id=self.player.unique_id,
+            uri=self.uri,
+            filter_graph=self.audio_player.filter_graph,
+            source_type=self.audio_player.source_type,
+            usage=usage,
+        )
+
     def OnUpdate(self, old_position: int, new_position: int) -> None:
         delta = new_position - old_position
         self.last_position = new_position
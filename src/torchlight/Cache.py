@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+KT = TypeVar("KT", bound=Hashable)
+VT = TypeVar("VT")
+
+
+@dataclass
+class CacheEntry(Generic[VT]):
+    value: VT
+    expires: float
+    size: int
+
+
+class TTLCache(Generic[KT, VT]):
+    def __init__(
+        self,
+        *,
+        max_entries: int = 256,
+        ttl: float = 300.0,
+        max_bytes: int = 0,
+        sizeof: Callable[[VT], int] | None = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.entries: OrderedDict[KT, CacheEntry[VT]] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: KT) -> bool:
+        # Neither counts as a lookup nor refreshes the entry
+        entry = self.entries.get(key)
+        return entry is not None and entry.expires > time.monotonic()
+
+    def Get(self, key: KT) -> VT | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry.expires <= time.monotonic():
+            self.Delete(key)
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def Set(self, key: KT, value: VT, ttl: float | None = None) -> None:
+        self.Delete(key)
+
+        size = self.sizeof(value) if self.sizeof else 0
+        if self.max_bytes and size > self.max_bytes:
+            return
+
+        self.entries[key] = CacheEntry(
+            value=value,
+            expires=time.monotonic() + (self.ttl if ttl is None else ttl),
+            size=size,
+        )
+        self.size += size
+
+        # Least recently used entries go first
+        while len(self.entries) > self.max_entries or (self.max_bytes and self.size > self.max_bytes):
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= evicted.size
+
+    def Delete(self, key: KT) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def Clear(self) -> None:
+        self.entries.clear()
+        self.size = 0
+
+    def HitRate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class DiskCache:
+    def __init__(self, *, path: str, max_bytes: int) -> None:
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.path, exist_ok=True)
+        self.size = sum(entry.stat().st_size for entry in os.scandir(self.path) if entry.is_file())
+
+    def GetPath(self, key: str) -> str:
+        return os.path.join(self.path, key)
+
+    def Get(self, key: str) -> bytes | None:
+        path = self.GetPath(key)
+        try:
+            with open(path, "rb") as fp:
+                data = fp.read()
+            # The modification time is what orders the entries for eviction
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+        return data
+
+    def Set(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+
+        path = self.GetPath(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "wb") as fp:
+                fp.write(data)
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temp_path, path)
+        except OSError as exc:
+            self.logger.error(f"Unable to write {path}: {exc}")
+            return
+
+        with self.lock:
+            self.size += len(data) - old_size
+            if self.size > self.max_bytes:
+                self.Evict()
+
+    def Evict(self) -> None:
+        entries = sorted(
+            (entry for entry in os.scandir(self.path) if entry.is_file() and not entry.name.endswith(".tmp")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in entries:
+            if self.size <= self.max_bytes:
+                break
+            try:
+                size = entry.stat().st_size
+                os.unlink(entry.path)
+            except OSError:
+                continue
+            self.size -= size
+
+    def HitRate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class SingleFlight(Generic[KT, VT]):
+    def __init__(self) -> None:
+        self.calls: dict[KT, asyncio.Future[VT]] = {}
+        self.waiters: dict[asyncio.Future[VT], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.calls)
+
+    async def Do(self, key: KT, func: Callable[[], Awaitable[VT]]) -> VT:
+        future = self.calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self.calls[key] = future
+            future.add_done_callback(lambda _: self.Done(key, future))
+
+        # A caller giving up must not cancel the call for everyone else waiting on it
+        self.waiters[future] = self.waiters.get(future, 0) + 1
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self.waiters[future] -= 1
+            if not self.waiters[future]:
+                del self.waiters[future]
+                # Unless it was the last one, then nobody needs the result anymore
+                future.cancel()
+
+    def Done(self, key: KT, future: asyncio.Future[VT]) -> None:
+        if self.calls.get(key) is future:
+            del self.calls[key]
+        # Mark the exception as retrieved in case every caller has given up already
+        if not future.cancelled():
+            future.exception()
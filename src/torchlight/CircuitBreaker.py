@@ -0,0 +1,67 @@
+import time
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, *, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+        self.successes_total = 0
+        self.failures_total = 0
+        self.rejected_total = 0
+        self.opened_total = 0
+
+    def Allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected_total += 1
+                return False
+            self.state = self.HALF_OPEN
+            self.probing = False
+
+        if self.state == self.HALF_OPEN:
+            # A single request finds out whether the service is back
+            if self.probing:
+                self.rejected_total += 1
+                return False
+            self.probing = True
+
+        return True
+
+    def RecordSuccess(self) -> None:
+        self.successes_total += 1
+        self.failures = 0
+        self.probing = False
+        self.state = self.CLOSED
+
+    def RecordFailure(self) -> None:
+        self.failures_total += 1
+        self.failures += 1
+        self.probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.opened_total += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def Release(self) -> None:
+        # Neither outcome, e.g. the caller was cancelled
+        self.probing = False
+
+    def __str__(self) -> str:
+        return (
+            f"{self.state}, {self.successes_total} ok, {self.failures_total} failed"
+            f", {self.rejected_total} rejected, opened {self.opened_total}x"
+        )
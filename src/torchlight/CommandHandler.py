@@ -2,12 +2,12 @@ import logging
 import sys
 import traceback
 from importlib import reload
-from re import Match
 from typing import Any
 
 from torchlight.AccessManager import AccessManager
 from torchlight.AudioManager import AudioManager
-from torchlight.Commands import BaseCommand, Say, VoiceTrigger
+from torchlight.CommandIndex import CommandIndex, Position
+from torchlight.Commands import BaseCommand, Say, URLFilter, VoiceTrigger
 from torchlight.PlayerManager import Player, PlayerManager
 from torchlight.Torchlight import Torchlight
 from torchlight.TriggerManager import TriggerManager
@@ -29,6 +29,7 @@ class CommandHandler:
         self.audio_manager = audio_manager
         self.trigger_manager = trigger_manager
         self.commands: list[BaseCommand] = []
+        self.command_index = CommandIndex()
         self.needs_reload = False
 
     def Setup(self) -> None:
@@ -59,6 +60,7 @@ class CommandHandler:
                 self.commands.append(command)
                 counter += 1
 
+        self.command_index.Build(self.commands)
         self.logger.info(sys._getframe().f_code.co_name + f" Loaded {counter} commands!")
 
     def Reload(self) -> None:
@@ -73,6 +75,32 @@ class CommandHandler:
             self.logger.info("Commands reloaded successfully")
 
     # @profile
+    async def PreviewLinks(self, line: str, player: Player) -> None:
+        for command in self.commands:
+            if not isinstance(command, URLFilter) or player.admin.level < command.level:
+                continue
+            match = command.url_regex.search(line)
+            if match is not None:
+                await command._rfunc(line, match, player)
+
+    def SuggestTriggers(self, trigger: str, player: Player) -> None:
+        search_config = self.torchlight.config.config.get("TriggerSearch", {})
+        if not search_config.get("Suggest", False):
+            return
+
+        # Other server plugins answer their own ! commands
+        if trigger.lower() in (ignored.lower() for ignored in search_config.get("SuggestIgnore", [])):
+            return
+
+        current_time = self.torchlight.loop.time()
+        if player.suggest_cooldown > current_time:
+            return
+
+        suggestions = self.trigger_manager.Suggest(trigger)
+        if suggestions:
+            player.suggest_cooldown = current_time + float(search_config.get("SuggestCooldown", 30))
+            self.torchlight.SayPrivate(player, "Did you mean {}?".format(" or ".join(suggestions)))
+
     async def HandleCommand(self, line: str, player: Player, from_menu: bool = False) -> int | None:
         if from_menu:
             message = line.split(sep=" ", maxsplit=2)  # 2 because the !search command requires another arg for page
@@ -90,64 +118,53 @@ class CommandHandler:
         level = player.admin.level
 
         if not message[0].startswith(("!", "#", "_", "$", "@", "%", "^", "&", "*", "-")):
+            self.torchlight.youtube_extractor.PrefetchChatLinks(line)
+            # Fetching whatever players link is opt-in, the server makes those requests
+            if self.torchlight.config.config.get("URLMetadata", {}).get("Previews", False):
+                await self.PreviewLinks(line, player)
             return None
 
         ret_message: str | None = None
         ret: int | None = None
-        for command in self.commands:
-            for trigger in command.triggers:
-                is_match = False
-                r_match: Match | None = None
-                self.logger.debug(type(trigger))
-                self.logger.debug(f"Trigger: {trigger}")
-                if isinstance(trigger, tuple):
-                    is_match = message[0].lower().startswith(trigger[0], 0, trigger[1])
-                elif isinstance(trigger, str):
-                    is_match = message[0].lower() == trigger.lower()
-                else:  # compiled regex
-                    is_match = trigger.search(message[0]) is not None
-
-                if not is_match:
-                    continue
-
-                self.logger.debug(
-                    sys._getframe().f_code.co_name
-                    + f' "{player.name}" Match -> {command.__class__.__name__} | {trigger}'
-                )
-
-                if level < command.level:
-                    ret_message = f"You do not have access to this command! (You: {level} | Required: {command.level})"
-                    continue
+        position: Position = (-1, -1)
+        matched = False
+        while (match := self.command_index.Next(message[0], position)) is not None:
+            matched = True
+            # A command which handled the line still gets its remaining triggers, nothing after it does
+            if ret is not None and ret >= 0 and match[0] != position[0]:
+                break
 
-                try:
-                    if r_match is not None:
-                        ret_temp = await command._rfunc(line, r_match, player)
+            position = match
+            command = self.commands[position[0]]
+            self.logger.debug(
+                sys._getframe().f_code.co_name
+                + f' "{player.name}" Match -> {command.__class__.__name__} | {command.triggers[position[1]]}'
+            )
 
-                        if isinstance(ret_temp, str):
-                            message = ret_temp.split(sep=" ", maxsplit=1)
-                            ret = None
-                        else:
-                            ret = ret_temp
-                    else:
-                        ret = await command._func(message, player)
-                        if from_menu and command.__class__.__name__ == "VoiceTrigger" and ret:
-                            self.torchlight.SayChat(f"{{olive}}{player.name}: {{default}}{line}")
+            if level < command.level:
+                ret_message = f"You do not have access to this command! (You: {level} | Required: {command.level})"
+                continue
 
-                except Exception as e:
-                    self.logger.error(traceback.format_exc())
-                    self.torchlight.SayChat(f"Error: {str(e)}")
+            try:
+                ret = await command._func(message, player)
+                if from_menu and command.__class__.__name__ == "VoiceTrigger" and ret:
+                    self.torchlight.SayChat(f"{{olive}}{player.name}: {{default}}{line}")
 
-                ret_message = None
+            except Exception as e:
+                self.logger.error(traceback.format_exc())
+                self.torchlight.SayChat(f"Error: {str(e)}")
 
-                if ret is not None and ret > 0:
-                    break
+            ret_message = None
 
-            if ret is not None and ret >= 0:
+            if ret is not None and ret > 0:
                 break
 
         if ret_message:
             self.torchlight.SayPrivate(player, ret_message)
 
+        if not matched and not from_menu and message[0].startswith("!"):
+            self.SuggestTriggers(message[0], player)
+
         if self.needs_reload:
             self.needs_reload = False
             self.Reload()
@@ -0,0 +1,67 @@
+import bisect
+from dataclasses import dataclass, field
+from re import Pattern
+from typing import Any
+
+# (command index, trigger index), which is also the order triggers used to be tried in
+Position = tuple[int, int]
+
+
+@dataclass
+class TrieNode:
+    children: dict[str, "TrieNode"] = field(default_factory=dict)
+    positions: list[Position] = field(default_factory=list)
+
+
+def get_first_after(positions: list[Position], after: Position) -> Position | None:
+    index = bisect.bisect_right(positions, after)
+    return positions[index] if index < len(positions) else None
+
+
+class CommandIndex:
+    def __init__(self) -> None:
+        self.exact: dict[str, list[Position]] = {}
+        self.prefixes = TrieNode()
+        self.regexes: list[tuple[Position, Pattern]] = []
+
+    def Build(self, commands: list[Any]) -> None:
+        self.exact = {}
+        self.prefixes = TrieNode()
+        self.regexes = []
+
+        for command_index, command in enumerate(commands):
+            for trigger_index, trigger in enumerate(command.triggers):
+                position = (command_index, trigger_index)
+                if isinstance(trigger, tuple):
+                    node = self.prefixes
+                    for char in trigger[0]:
+                        node = node.children.setdefault(char, TrieNode())
+                    node.positions.append(position)
+                elif isinstance(trigger, str):
+                    self.exact.setdefault(trigger.lower(), []).append(position)
+                else:  # compiled regex
+                    self.regexes.append((position, trigger))
+
+    def Next(self, command: str, after: Position) -> Position | None:
+        word = command.lower()
+        candidates = [get_first_after(self.exact.get(word, []), after)]
+        node = self.prefixes
+        # Every node along the way is a trigger the word starts with
+        candidates.append(get_first_after(node.positions, after))
+        for char in word:
+            child = node.children.get(char)
+            if child is None:
+                break
+            node = child
+            candidates.append(get_first_after(node.positions, after))
+        best = min((candidate for candidate in candidates if candidate is not None), default=None)
+
+        # Only search with the regexes which come before the best plain match
+        for index in range(bisect.bisect_right(self.regexes, after, key=lambda regex: regex[0]), len(self.regexes)):
+            position, pattern = self.regexes[index]
+            if best is not None and position > best:
+                break
+            if pattern.search(command) is not None:
+                return position
+
+        return best
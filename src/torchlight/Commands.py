@@ -1,38 +1,36 @@
 import ast
 import asyncio
 import datetime
+import json
 import logging
 import os
 import re
 import secrets
 import sys
-import tempfile
 import traceback
 from pathlib import Path
 from re import Match, Pattern
 from typing import Any, cast
 
-import aiohttp
-import defusedxml.ElementTree as etree
-import geoip2.database
 import gtts
-from translatepy import Translate as Translator
 
 from torchlight.AccessManager import AccessManager
 from torchlight.AudioManager import AudioManager
 from torchlight.Config import Config
-from torchlight.MyInstants import myinstants_get_random_sound
+from torchlight.HTTPClient import normalize_query
+from torchlight.Parsers import parse_wolfram_pods
 from torchlight.Player import Player
 from torchlight.PlayerManager import PlayerManager
+from torchlight.TextToSpeech import get_dectalk_key, get_tts_key
 from torchlight.Torchlight import Torchlight
 from torchlight.TriggerManager import TriggerManager
 from torchlight.URLInfo import (
     get_audio_format,
-    get_first_valid_entry,
+    get_url_metadata,
     get_url_real_time,
     get_url_text,
-    get_url_youtube_info,
-    print_url_metadata,
+    normalize_url,
+    youtube_regex,
 )
 
 
@@ -112,8 +110,9 @@ class BaseCommand:
 class URLFilter(BaseCommand):
     order = 1
 
-    youtube_regex = re.compile(
-        r".*?(?:youtube\.com\/\S*(?:(?:\/e(?:mbed))?\/|watch\?(?:\S*?&?v\=))|youtu\.be\/)([a-zA-Z0-9_-]{6,11}).*?"
+    url_regex = re.compile(
+        r"""(?i)\b((?:https?://|www\d{0,3}[.]|[a-z0-9.\-]+[.][a-z]{2,4}/)(?:[^\s()<>]+|\(([^\s()<>]+|(\([^\s()<>]+\)))*\))+(?:\(([^\s()<>]+|(\([^\s()<>]+\)))*\)|[^\s`!()\[\]{};:'".,<>?«»“”‘’]))""",
+        re.IGNORECASE,
     )
 
     def __init__(
@@ -131,20 +130,38 @@ class URLFilter(BaseCommand):
             audio_manager,
             trigger_manager,
         )
-        self.triggers = [
-            re.compile(
-                r"""(?i)\b((?:https?://|www\d{0,3}[.]|[a-z0-9.\-]+[.][a-z]{2,4}/)(?:[^\s()<>]+|\(([^\s()<>]+|(\([^\s()<>]+\)))*\))+(?:\(([^\s()<>]+|(\([^\s()<>]+\)))*\)|[^\s`!()\[\]{};:'".,<>?«»“”‘’]))""",
-                re.IGNORECASE,
-            )
-        ]
+        self.triggers = [self.url_regex]
         self.level: int = -1
 
     async def URLInfo(self, url: str) -> None:
-        try:
-            await print_url_metadata(url=url, callback=self.torchlight.SayChat)
-        except Exception as e:
-            self.torchlight.SayChat(f"Error: {str(e)}")
-            self.logger.error(traceback.format_exc())
+        key = normalize_url(url)
+
+        metadata = self.torchlight.url_metadata_cache.Get(key)
+        if metadata is None:
+            try:
+                # Everyone posting the same link at once shares a single request
+                metadata = await self.torchlight.url_flight.Do(
+                    ("metadata", key),
+                    lambda: get_url_metadata(
+                        url=url,
+                        http_client=self.torchlight.http_client,
+                        parser_pool=self.torchlight.parser_pool,
+                    ),
+                )
+                self.torchlight.url_metadata_cache.Set(key, metadata)
+            except Exception as e:
+                metadata = ""
+                # Reposts of a broken link stay quiet for a while
+                self.torchlight.url_metadata_cache.Set(
+                    key,
+                    metadata,
+                    ttl=float(self.torchlight.config.config.get("URLMetadata", {}).get("NegativeTTL", 60)),
+                )
+                self.torchlight.SayChat(f"Error: {str(e)}")
+                self.logger.error(traceback.format_exc())
+
+        if metadata:
+            self.torchlight.SayChat(metadata)
 
         self.torchlight.last_url = url
 
@@ -152,7 +169,9 @@ class URLFilter(BaseCommand):
         text = ""
 
         try:
-            text = await get_url_text(url=url)
+            text = await self.torchlight.url_flight.Do(
+                ("text", normalize_url(url)), lambda: get_url_text(url=url, http_client=self.torchlight.http_client)
+            )
         except Exception as e:
             self.torchlight.SayChat(f"Error: {str(e)}")
             self.logger.error(traceback.format_exc())
@@ -253,35 +272,19 @@ class WolframAlpha(BaseCommand):
         ).strip()
 
     async def Calculate(self, parameters_json: dict[str, str], player: Player) -> int:
-        async with aiohttp.ClientSession() as session:
-            resp = await asyncio.wait_for(
-                session.get(
-                    "http://api.wolframalpha.com/v2/query",
-                    params=parameters_json,
-                ),
-                10,
-            )
-            if not resp:
-                return 1
-
-            data = await asyncio.wait_for(resp.text(), 5)
-            if not data:
-                return 2
-
-        root = etree.fromstring(data)
-
-        # Find all pods with plaintext answers
-        # Filter out None -answers, strip strings and filter out the empty ones
-        pods: list[str] = list(
-            filter(
-                None,
-                [p.text.strip() for p in root.findall(".//subpod/plaintext") if p is not None and p.text is not None],
-            )
+        _, data = await self.torchlight.http_client.GetCached(
+            "WolframAlpha",
+            "http://api.wolframalpha.com/v2/query",
+            params=parameters_json,
+            timeout=10,
         )
+        if not data:
+            return 2
+
+        pods, did_you_means = await self.torchlight.parser_pool.Run(parse_wolfram_pods, data)
 
         # no answer pods found, check if there are didyoumeans-elements
         if not pods:
-            did_you_means = root.find("didyoumeans")
             # no support for future stuff yet, TODO?
             if not did_you_means:
                 # If there's no pods, the question clearly wasn't understood
@@ -290,7 +293,7 @@ class WolframAlpha(BaseCommand):
 
             options = []
             for did_you_mean in did_you_means:
-                options.append(f'"{did_you_mean.text}"')
+                options.append(f'"{did_you_mean}"')
             line = " or ".join(options)
             line = f"Did you mean {line}?"
             self.torchlight.SayChat(line, player)
@@ -347,53 +350,34 @@ class UrbanDictionary(BaseCommand):
         if self.check_disabled(player):
             return -1
 
-        async with aiohttp.ClientSession() as session:
-            resp = await asyncio.wait_for(
-                session.get(f"https://api.urbandictionary.com/v0/define?term={message[1]}"),
-                5,
-            )
-            if not resp:
-                return 1
+        _, text = await self.torchlight.http_client.GetCached(
+            "UrbanDictionary",
+            f"https://api.urbandictionary.com/v0/define?term={message[1]}",
+            cache_key=normalize_query(message[1]),
+        )
+        if not text:
+            return 1
 
-            data = await asyncio.wait_for(resp.json(), 5)
-            if not data:
-                return 3
+        data = json.loads(text)
+        if not data:
+            return 3
 
-            if "list" not in data or not data["list"]:
-                self.torchlight.SayChat(f"[UB] No definition found for: {message[1]}", player)
-                return 4
+        if "list" not in data or not data["list"]:
+            self.torchlight.SayChat(f"[UB] No definition found for: {message[1]}", player)
+            return 4
 
-            def print_item(item: dict[str, Any]) -> None:
-                self.torchlight.SayChat(
-                    "[UD] {word} ({thumbs_up}/{thumbs_down}): {definition}\n{example}".format(**item),
-                    player,
-                )
+        def print_item(item: dict[str, Any]) -> None:
+            self.torchlight.SayChat(
+                "[UD] {word} ({thumbs_up}/{thumbs_down}): {definition}\n{example}".format(**item),
+                player,
+            )
 
-            print_item(data["list"][0])
+        print_item(data["list"][0])
 
         return 0
 
 
 class OpenWeather(BaseCommand):
-    def __init__(
-        self,
-        torchlight: Torchlight,
-        access_manager: AccessManager,
-        player_manager: PlayerManager,
-        audio_manager: AudioManager,
-        trigger_manager: TriggerManager,
-    ) -> None:
-        super().__init__(
-            torchlight,
-            access_manager,
-            player_manager,
-            audio_manager,
-            trigger_manager,
-        )
-        self.config_folder = self.torchlight.config["GeoIP"]["Path"]
-        self.city_filename = self.torchlight.config["GeoIP"]["CityFilename"]
-        self.geo_ip = geoip2.database.Reader(f"{self.config_folder}/{self.city_filename}")
-
     def degreeToCardinal(self, degree: int) -> str:
         directions = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
         return directions[int(((degree + 22.5) / 45.0) % 8)]
@@ -408,27 +392,30 @@ class OpenWeather(BaseCommand):
             return -1
 
         if not message[1]:
-            # Use GeoIP location
-            info = self.geo_ip.city(player.address.split(":")[0])
-            search = f"lat={info.location.latitude}&lon={info.location.longitude}"
+            # Use the GeoIP location resolved on connect
+            if player.location is None:
+                self.torchlight.SayPrivate(player, "[OW] Unable to find your location, try !w <city>")
+                return 1
+            latitude, longitude = player.location
+            search = f"lat={latitude}&lon={longitude}"
+            cache_key = None
         else:
             search = f"q={message[1]}"
+            cache_key = normalize_query(message[1])
 
-        async with aiohttp.ClientSession() as session:
-            resp = await asyncio.wait_for(
-                session.get(
-                    "https://api.openweathermap.org/data/2.5/weather?APPID={}&units=metric&{}".format(
-                        self.torchlight.config["OpenWeatherAPIKey"], search
-                    )
-                ),
-                5,
-            )
-            if not resp:
-                return 2
+        _, text = await self.torchlight.http_client.GetCached(
+            "OpenWeather",
+            "https://api.openweathermap.org/data/2.5/weather?APPID={}&units=metric&{}".format(
+                self.torchlight.config["OpenWeatherAPIKey"], search
+            ),
+            cache_key=cache_key,
+        )
+        if not text:
+            return 2
 
-            data = await asyncio.wait_for(resp.json(), 5)
-            if not data:
-                return 3
+        data = json.loads(text)
+        if not data:
+            return 3
 
         if data["cod"] != 200:
             self.torchlight.SayPrivate(player, "[OW] {}".format(data["message"]))
@@ -478,49 +465,16 @@ class WUnderground(BaseCommand):
             search = "autoip"
             additional = "?geo_ip={}".format(player.address.split(":")[0])
         else:
-            async with aiohttp.ClientSession() as session:
-                resp = await asyncio.wait_for(
-                    session.get(f"http://autocomplete.wunderground.com/aq?format=JSON&query={message[1]}"),
-                    5,
-                )
-                if not resp:
-                    return 2
-
-                try:
-                    data = await asyncio.wait_for(resp.json(), 5)
-                    if not data:
-                        return 3
-                except Exception as e:
-                    self.logger.error(e)
-                    self.torchlight.SayPrivate(
-                        message="Failed to retrieve data from the wunderground api",
-                        player=player,
-                    )
-                    return 1
-
-            if not data["RESULTS"]:
-                self.torchlight.SayPrivate(player, "[WU] No cities match your search query.")
-                return 4
-
-            search = data["RESULTS"][0]["name"]
-            additional = ""
-
-        async with aiohttp.ClientSession() as session:
-            resp = await asyncio.wait_for(
-                session.get(
-                    "http://api.wunderground.com/api/{}/conditions/q/{}.json{}".format(
-                        self.torchlight.config["WundergroundAPIKey"],
-                        search,
-                        additional,
-                    )
-                ),
-                5,
+            _, text = await self.torchlight.http_client.GetCached(
+                "WUnderground",
+                f"http://autocomplete.wunderground.com/aq?format=JSON&query={message[1]}",
+                cache_key=normalize_query(message[1]),
             )
-            if not resp:
+            if not text:
                 return 2
 
             try:
-                data = await asyncio.wait_for(resp.json(), 5)
+                data = json.loads(text)
                 if not data:
                     return 3
             except Exception as e:
@@ -531,6 +485,36 @@ class WUnderground(BaseCommand):
                 )
                 return 1
 
+            if not data["RESULTS"]:
+                self.torchlight.SayPrivate(player, "[WU] No cities match your search query.")
+                return 4
+
+            search = data["RESULTS"][0]["name"]
+            additional = ""
+
+        _, text = await self.torchlight.http_client.GetCached(
+            "WUnderground",
+            "http://api.wunderground.com/api/{}/conditions/q/{}.json{}".format(
+                self.torchlight.config["WundergroundAPIKey"],
+                search,
+                additional,
+            ),
+        )
+        if not text:
+            return 2
+
+        try:
+            data = json.loads(text)
+            if not data:
+                return 3
+        except Exception as e:
+            self.logger.error(e)
+            self.torchlight.SayPrivate(
+                message="Failed to retrieve data from the wunderground api",
+                player=player,
+            )
+            return 1
+
         if "error" in data["response"]:
             self.torchlight.SayPrivate(
                 player,
@@ -685,19 +669,11 @@ class VoiceTrigger(BaseCommand):
             elif trigger_number:
                 searching = trigger_number.startswith("?")
                 search = trigger_number[1:] if searching else trigger_number
-                sound = None
-                names = []
-                matches = []
-                for sound in sounds:
-                    name = os.path.splitext(os.path.basename(sound))[0]
-                    names.append(name)
-
-                    if search and search in name.lower():
-                        matches.append((name, sound))
+                sound_index = self.trigger_manager.sound_indexes[voice_trigger]
+                matches = sound_index.Search(search)
 
                 if matches:
-                    matches.sort(key=lambda t: len(t[0]))
-                    mlist = [t[0] for t in matches]
+                    mlist = [sound_index.names[index] for index in matches]
                     if searching:
                         self.torchlight.SayPrivate(
                             player,
@@ -705,29 +681,29 @@ class VoiceTrigger(BaseCommand):
                         )
                         return None
 
-                    sound = matches[0][1]
+                    sound = sounds[matches[0]]
                     if len(matches) > 1:
                         self.torchlight.SayPrivate(
                             player,
                             "Multiple matches: {}".format(", ".join(mlist)),
                         )
 
-                if not sound and not num:
+                elif num:
+                    self.torchlight.SayPrivate(
+                        player,
+                        f"Number {num} is out of bounds, max {len(sounds)}.",
+                    )
+                    return None
+
+                else:
                     if not searching:
                         self.torchlight.SayPrivate(
                             player,
                             f"Couldn't find {trigger_number} in list of sounds.",
                         )
-                    self.torchlight.SayPrivate(player, ", ".join(names))
+                    self.torchlight.SayPrivate(player, ", ".join(sound_index.names))
                     return None
 
-            elif num:
-                self.torchlight.SayPrivate(
-                    player,
-                    f"Number {num} is out of bounds, max {len(sounds)}.",
-                )
-                return None
-
             else:
                 sound = secrets.choice(sounds)
         else:
@@ -755,14 +731,14 @@ class Search(BaseCommand):
         self,
         cmd: str,
         search: str,
-        res: dict[str, str],
+        res: list[str],
         page: int,
         max_items: int,
         max_pages: int,
     ) -> dict[str, str]:
         start = (page - 1) * max_items
         end = start + max_items
-        soundsItems = dict(list(res.items())[start:end])
+        soundsItems = {entry: entry for entry in res[start:end]}
 
         if search == "":
             line = cmd
@@ -798,27 +774,15 @@ class Search(BaseCommand):
         if len(message) > 2 and message[2].isdigit():
             page = int(message[2])
 
-        res: dict[str, str] = {}
-
-        for key in self.trigger_manager.voice_triggers.keys():
-            if voice_trigger in key.lower():
-                if isinstance(self.trigger_manager.voice_triggers[key]["sounds"], list):
-                    sounds = self.trigger_manager.voice_triggers[key]["sounds"]
-                    if len(sounds) > 1:
-                        for i in enumerate(sounds):
-                            res[f"{key} {i[0] + 1}"] = f"{key} {i[0] + 1}"
-                    else:
-                        res[key] = key
-                elif isinstance(self.trigger_manager.voice_triggers[key]["sounds"], str):
-                    res[key] = key
+        results = self.trigger_manager.Search(voice_trigger)
 
-        if not res:
+        if not results.entries:
             self.torchlight.SayPrivate(player, "No triggers found with that name.")
             return 1
 
-        self.torchlight.SayPrivate(player, "{} results: {}".format(len(res), ", ".join(res.keys())))
+        self.torchlight.SayPrivate(player, f"{len(results.entries)} results: {results.listing}")
 
-        actual_count = len(res)
+        actual_count = len(results.entries)
         max = self.get_config().get("parameters", {}).get("max_results", 30)
 
         max_pages = (actual_count + max - 1) // max
@@ -830,13 +794,14 @@ class Search(BaseCommand):
         start = (page - 1) * max if page else 0
         end = actual_count
 
+        res = {entry: entry for entry in results.entries[:max]}
         if actual_count > max:
             end = start + max
 
             res = self.get_menu_page_content(
                 cmd=message[0],
                 search=voice_trigger,
-                res=res,
+                res=results.entries,
                 page=page,
                 max_items=max,
                 max_pages=max_pages,
@@ -888,7 +853,7 @@ class YouTubeSearch(BaseCommand):
         command_config = self.get_config()
 
         input_keywords = message[1]
-        if URLFilter.youtube_regex.search(input_keywords):
+        if youtube_regex.search(input_keywords):
             input_url = input_keywords
         else:
             input_url = f"ytsearch3: {input_keywords}"
@@ -897,8 +862,10 @@ class YouTubeSearch(BaseCommand):
 
         proxy = command_config.get("parameters", {}).get("proxy", "")
 
+        youtube_extractor = self.torchlight.youtube_extractor
+
         try:
-            info = get_url_youtube_info(url=input_url, proxy=proxy)
+            info = await youtube_extractor.ExtractInfo(input_url, proxy)
         except Exception as exc:
             self.logger.error(f"Failed to extract youtube info from: {input_url}")
             self.logger.error(exc)
@@ -909,12 +876,12 @@ class YouTubeSearch(BaseCommand):
             return 1
 
         if "title" not in info and "url" in info:
-            info = get_url_youtube_info(url=info["url"], proxy=proxy)
+            info = await youtube_extractor.ExtractInfo(info["url"], proxy)
         if info["extractor_key"] == "YoutubeSearch":
-            info = get_first_valid_entry(entries=info["entries"], proxy=proxy)
+            info = await youtube_extractor.GetFirstValidEntry(info["entries"], proxy)
 
         title = info["title"]
-        url = get_audio_format(info=info)
+        url = get_audio_format(info=info, min_bitrate=youtube_extractor.min_bitrate)
         title_words = title.split()
         keywords_banned: list[str] = []
 
@@ -939,7 +906,7 @@ class YouTubeSearch(BaseCommand):
 
         self.torchlight.last_url = url
 
-        return audio_clip.Play(real_time)
+        return audio_clip.Play(real_time, prebuffer=youtube_extractor.GetPrebuffer(url))
 
 
 class Say(BaseCommand):
@@ -1010,23 +977,21 @@ class Say(BaseCommand):
         ]
 
     async def Say(self, player: Player, language: str, tld: str, message: str) -> int:
-        google_text_to_speech = gtts.gTTS(text=message, tld=tld, lang=language, lang_check=False)
-
-        temp_file = tempfile.NamedTemporaryFile(delete=False)
-        google_text_to_speech.write_to_fp(temp_file)
-        temp_file.close()
+        try:
+            stream = await self.torchlight.text_to_speech.Stream(message, language, tld)
+        except Exception as e:
+            self.torchlight.SayPrivate(player, f"TTS failed: {e}")
+            return 1
 
-        audio_clip = self.audio_manager.AudioClip(player, Path(temp_file.name).absolute().as_uri())
+        audio_clip = self.audio_manager.AudioClip(
+            player, f"gtts://{language}.{tld}/{get_tts_key(message, language, tld)}"
+        )
         if not audio_clip:
-            os.unlink(temp_file.name)
             return 1
 
-        if audio_clip.Play():
-            audio_clip.audio_player.AddCallback("Stop", lambda: os.unlink(temp_file.name))
+        if audio_clip.Play(source=stream):
             return 0
-        else:
-            os.unlink(temp_file.name)
-            return 1
+        return 1
 
     def HandleSay(self, message: list[str], player: Player) -> tuple[str, str] | None:
         language: str = ""
@@ -1117,78 +1082,36 @@ class Say(BaseCommand):
 
 
 class TranslateSay(Say):
-    def _setup(self) -> None:
-        self.translator = Translator()
-
     async def Say(self, player: Player, language: str, tld: str, message: str) -> int:
         if language not in self.VALID_LANGUAGES:
             self.torchlight.SayPrivate(player, f"Sorry, TTS for '{language}' is not supported.")
             return 1
 
         try:
-            translated = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.translator.translate(message, language)
-            )
-            translated_text = translated.result
+            translated_text = await self.torchlight.translator.Translate(message, language)
         except Exception as e:
             self.torchlight.SayPrivate(player, f"Translation failed: {e}")
             return 1
 
-        try:
-            tts = gtts.gTTS(text=translated_text, lang=language, tld=tld, lang_check=False)
-            temp_file = tempfile.NamedTemporaryFile(delete=False)
-            tts.write_to_fp(temp_file)
-            temp_file.close()
-        except Exception as e:
-            self.torchlight.SayPrivate(player, f"TTS failed: {e}")
-            return 1
-
-        audio_clip = self.audio_manager.AudioClip(player, Path(temp_file.name).absolute().as_uri())
-
-        if not audio_clip:
-            os.unlink(temp_file.name)
-            return 1
-
-        if audio_clip.Play():
-            audio_clip.audio_player.AddCallback("Stop", lambda: os.unlink(temp_file.name))
-            return 0
-
-        os.unlink(temp_file.name)
-        return 1
+        return await super().Say(player, language, tld, translated_text)
 
 
 class DECTalk(BaseCommand):
     async def Say(self, player: Player, message: str) -> int:
         message = "[:phoneme on]" + message
-        temp_file = tempfile.NamedTemporaryFile(delete=False)
-        temp_file.close()
 
-        dectalk_path = os.path.abspath(self.torchlight.config.config.get("DECTalk", {}).get("Path", "dectalk"))
-        dectalk_say_path = os.path.abspath(
-            os.path.join(
-                dectalk_path,
-                self.torchlight.config.config.get("DECTalk", {}).get("SayFilename", "say"),
-            )
-        )
-        subprocess = await asyncio.create_subprocess_exec(
-            dectalk_say_path,
-            "-fo",
-            temp_file.name,
-            cwd=dectalk_path,
-            stdin=asyncio.subprocess.PIPE,
-        )
-        await subprocess.communicate(message.encode("utf-8", errors="ignore"))
+        try:
+            stream = await self.torchlight.text_to_speech.StreamDECTalk(message)
+        except Exception as e:
+            self.torchlight.SayPrivate(player, f"TTS failed: {e}")
+            return 1
 
-        audio_clip = self.audio_manager.AudioClip(player, Path(temp_file.name).absolute().as_uri())
+        audio_clip = self.audio_manager.AudioClip(player, f"dectalk://{get_dectalk_key(message)}")
         if not audio_clip:
-            os.unlink(temp_file.name)
             return 1
 
-        if audio_clip.Play(None, "-af", "volume=10dB"):
-            audio_clip.audio_player.AddCallback("Stop", lambda: os.unlink(temp_file.name))
+        if audio_clip.Play(None, "-af", "volume=10dB", source=stream):
             return 0
-
-        os.unlink(temp_file.name)
         return 1
 
     async def _func(self, message: list[str], player: Player) -> int:
@@ -1404,6 +1327,27 @@ class Reload(BaseCommand):
         return 0
 
 
+class Stats(BaseCommand):
+    async def _func(self, message: list[str], player: Player) -> int:
+        self.logger.debug(sys._getframe().f_code.co_name + " " + str(message))
+
+        lines = (
+            self.torchlight.process_accounting.Summary()
+            + self.torchlight.translator.Summary()
+            + self.torchlight.myinstants.Summary()
+            + self.torchlight.parser_pool.Summary()
+            + self.torchlight.http_client.Summary()
+            + self.torchlight.text_to_speech.Summary()
+        )
+        if not lines:
+            self.torchlight.SayPrivate(player, "No statistics collected yet.")
+            return 1
+
+        for line in lines:
+            self.torchlight.SayPrivate(player, line)
+        return 0
+
+
 class Exec(BaseCommand):
     async def _func(self, message: list[str], player: Player) -> int:
         self.logger.debug(sys._getframe().f_code.co_name + " " + str(message))
@@ -1461,11 +1405,7 @@ class MyInstantsSearch(BaseCommand):
 
         player.myinstants_cooldown = current_time + cooldown
 
-        proxy = None
-        if self.torchlight.config["VoiceServer"]["Proxy"]:
-            proxy = self.torchlight.config["VoiceServer"]["Proxy"]
-
-        url = await asyncio.to_thread(myinstants_get_random_sound, search, proxy)
+        url = await self.torchlight.myinstants.GetRandomSound(search)
 
         if url is None:
             if search:
@@ -1479,6 +1419,12 @@ class MyInstantsSearch(BaseCommand):
             return 1
 
         self.torchlight.last_url = url
+        data = await self.torchlight.myinstants.GetCachedSound(url)
+        if data is not None:
+            return audio_clip.Play(source=data)
+
+        # Streamed right away, the disk cache is filled in the background for the next time
+        self.torchlight.myinstants.Prefetch(url)
         return audio_clip.Play()
 
 
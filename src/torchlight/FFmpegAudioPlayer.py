@@ -7,9 +7,15 @@ import time
 import traceback
 from asyncio import StreamReader, StreamWriter
 from asyncio.subprocess import Process
-from collections.abc import Callable
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
 from typing import Any
 
+from torchlight.ProcessStats import (
+    ProcessUsage,
+    get_filter_graph,
+    get_source_type,
+    read_process_sample,
+)
 from torchlight.Torchlight import Torchlight
 
 SAMPLEBYTES = 2
@@ -36,6 +42,7 @@ class FFmpegAudioPlayer:
         self.speed = float(params.get("Speed", {}).get("Default", 1.0))
         self.pitch = float(params.get("Pitch", {}).get("Default", 1.0))
         self.proxy = self.config.get("Proxy", "")
+        self.stats_interval = float(self.config.get("StatsInterval", 1.0))
 
         self.started_playing: float | None = None
         self.stopped_playing: float | None = None
@@ -45,6 +52,10 @@ class FFmpegAudioPlayer:
         self.ffmpeg_process: Process | None = None
         self.curl_process: Process | None = None
 
+        self.filter_graph = ""
+        self.source_type = ""
+        self.usage: dict[str, ProcessUsage] = {}
+
         self.callbacks: list[tuple[str, Callable]] = []
 
     def __del__(self) -> None:
@@ -60,6 +71,8 @@ class FFmpegAudioPlayer:
         volume: float | None = None,
         speed: float | None = None,
         pitch: float | None = None,
+        prebuffer: bytes | None = None,
+        source: bytes | AsyncIterator[bytes] | None = None,
     ) -> bool:
         if volume is None:
             volume = self.volume
@@ -92,6 +105,14 @@ class FFmpegAudioPlayer:
                     self.proxy,
                 ]
             )
+        if prebuffer:
+            # The beginning of the stream is already there, only fetch the rest
+            curl_command.extend(
+                [
+                    "--range",
+                    f"{len(prebuffer)}-",
+                ]
+            )
         ffmpeg_command = [
             "/usr/bin/ffmpeg",
             "-i",
@@ -126,10 +147,12 @@ class FFmpegAudioPlayer:
 
         self.playing = True
         self.uri = uri
+        self.filter_graph = get_filter_graph(ffmpeg_command)
+        self.source_type = get_source_type(uri)
 
         self.logger.info("Playing %s", self.uri)
 
-        asyncio.ensure_future(self._stream_subprocess(curl_command, ffmpeg_command))
+        asyncio.ensure_future(self._stream_subprocess(curl_command, ffmpeg_command, prebuffer, source))
         return True
 
     # @profile
@@ -139,6 +162,9 @@ class FFmpegAudioPlayer:
 
         self.playing = False
 
+        # Last chance to read /proc before the children get killed and reaped
+        self.SampleProcesses()
+
         if self.ffmpeg_process:
             try:
                 self.ffmpeg_process.terminate()
@@ -193,6 +219,32 @@ class FFmpegAudioPlayer:
 
         return True
 
+    def SampleProcesses(self) -> None:
+        for name, process in (("ffmpeg", self.ffmpeg_process), ("curl", self.curl_process)):
+            if process is not None:
+                self.SampleProcess(name, process)
+
+    def SampleProcess(self, name: str, process: Process) -> None:
+        # Once reaped the pid may already belong to something else
+        if process.returncode is not None:
+            return
+
+        sample = read_process_sample(process.pid)
+        if sample is None:
+            return
+
+        self.usage.setdefault(name, ProcessUsage()).Update(sample)
+
+    async def _sample_until_exit(self, name: str, process: Process) -> None:
+        # The child watcher reaps the process as soon as it exits, so /proc has to be read while it still runs.
+        # Short clips are over within a few samples, sample often early on and back off for the long ones.
+        interval = 0.05
+        exit_task = asyncio.ensure_future(process.wait())
+        while not exit_task.done():
+            self.SampleProcess(name, process)
+            await asyncio.wait({exit_task}, timeout=interval)
+            interval = min(interval * 2, self.stats_interval)
+
     # @profile
     def AddCallback(self, cbtype: str, cbfunc: Callable) -> bool:
         if cbtype not in self.VALID_CALLBACKS:
@@ -249,6 +301,7 @@ class FFmpegAudioPlayer:
             while stream and self.playing:
                 data = await stream.read(65536)
                 if not data:
+                    self.SampleProcesses()
                     break
 
                 if writer is not None:
@@ -275,17 +328,25 @@ class FFmpegAudioPlayer:
             raise exc
 
     # @profile
-    async def _stream_subprocess(self, curl_command: list[str], ffmpeg_command: list[str]) -> None:
+    async def _stream_subprocess(
+        self,
+        curl_command: list[str],
+        ffmpeg_command: list[str],
+        prebuffer: bytes | None = None,
+        source: bytes | AsyncIterator[bytes] | None = None,
+    ) -> None:
         if not self.playing:
             return
 
         try:
             _, self.writer = await asyncio.open_connection(self.host, self.port)
 
-            self.curl_process = await asyncio.create_subprocess_exec(
-                *curl_command,
-                stdout=asyncio.subprocess.PIPE,
-            )
+            # Audio which is already in memory doesn't need to be downloaded
+            if source is None:
+                self.curl_process = await asyncio.create_subprocess_exec(
+                    *curl_command,
+                    stdout=asyncio.subprocess.PIPE,
+                )
 
             self.ffmpeg_process = await asyncio.create_subprocess_exec(
                 *ffmpeg_command,
@@ -294,14 +355,17 @@ class FFmpegAudioPlayer:
                 stderr=asyncio.subprocess.DEVNULL,
             )
 
-            asyncio.create_task(self._wait_for_process_exit(self.curl_process))
+            if self.curl_process is not None:
+                asyncio.create_task(self._wait_for_process_exit(self.curl_process))
 
-            asyncio.create_task(self._write_stream(self.curl_process.stdout, self.ffmpeg_process.stdin))
+                asyncio.create_task(self._write_stream(self.curl_process.stdout, self.ffmpeg_process.stdin, prebuffer))
+            elif source is not None:
+                asyncio.create_task(self._write_source(source, self.ffmpeg_process.stdin))
 
             asyncio.create_task(self._read_stream(self.ffmpeg_process.stdout, self.writer))
 
             if self.ffmpeg_process is not None:
-                await self.ffmpeg_process.wait()
+                await self._sample_until_exit("ffmpeg", self.ffmpeg_process)
 
             if self.seconds == 0.0:
                 self.Stop()
@@ -311,8 +375,17 @@ class FFmpegAudioPlayer:
             self.torchlight.SayChat(f"Error: {str(exc)}")
             raise exc
 
-    async def _write_stream(self, stream: StreamReader | None, writer: StreamWriter | None) -> None:
+    async def _write_stream(
+        self,
+        stream: StreamReader | None,
+        writer: StreamWriter | None,
+        prebuffer: bytes | None = None,
+    ) -> None:
         try:
+            if writer and prebuffer:
+                writer.write(prebuffer)
+                await writer.drain()
+
             while True:
                 if not stream:
                     break
@@ -330,9 +403,34 @@ class FFmpegAudioPlayer:
             self.torchlight.SayChat(f"Error: {str(exc)}")
             raise exc
 
+    async def _write_source(self, source: bytes | AsyncIterator[bytes], writer: StreamWriter | None) -> None:
+        try:
+            if isinstance(source, bytes):
+                if writer:
+                    writer.write(source)
+                    await writer.drain()
+            else:
+                try:
+                    async for chunk in source:
+                        if not writer or not self.playing:
+                            break
+
+                        writer.write(chunk)
+                        await writer.drain()
+                finally:
+                    # Lets the source stop whatever produces it right away instead of whenever it gets collected
+                    if isinstance(source, AsyncGenerator):
+                        await source.aclose()
+            if writer:
+                writer.close()
+        except Exception as exc:
+            self.Stop()
+            self.torchlight.SayChat(f"Error: {str(exc)}")
+            raise exc
+
     async def _wait_for_process_exit(self, curl_process: Process) -> None:
         try:
-            await curl_process.wait()
+            await self._sample_until_exit("curl", curl_process)
             if curl_process.returncode != 0 and curl_process.returncode != -15:
                 raise Exception(f"Curl process exited with error code {curl_process.returncode}")
         except Exception as exc:
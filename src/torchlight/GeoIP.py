@@ -0,0 +1,44 @@
+import logging
+import os
+
+import geoip2.database
+import geoip2.errors
+
+from torchlight.Config import Config
+
+
+class GeoIP:
+    def __init__(self, config: Config) -> None:
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = config
+        self.reader: geoip2.database.Reader | None = None
+        self.Open()
+
+    def Open(self) -> None:
+        geoip_config = self.config.config.get("GeoIP", {})
+        path = os.path.join(geoip_config.get("Path", ""), geoip_config.get("CityFilename", ""))
+
+        # Memory-mapped, the pages are shared and only the ones a lookup touches get read in
+        try:
+            self.reader = geoip2.database.Reader(path, mode=geoip2.database.MODE_MMAP)
+        except (OSError, ValueError) as exc:
+            self.logger.warning(f"Unable to open GeoIP database {path}: {exc}")
+            self.reader = None
+
+    def Locate(self, address: str) -> tuple[float, float] | None:
+        if self.reader is None:
+            return None
+
+        try:
+            info = self.reader.city(address.split(":")[0])
+        except (geoip2.errors.AddressNotFoundError, ValueError):
+            return None
+
+        if info.location.latitude is None or info.location.longitude is None:
+            return None
+        return info.location.latitude, info.location.longitude
+
+    def Shutdown(self) -> None:
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
@@ -0,0 +1,205 @@
+import asyncio
+import contextlib
+import logging
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlparse
+
+import aiohttp
+
+from torchlight.Cache import SingleFlight, TTLCache
+from torchlight.CircuitBreaker import CircuitBreaker, CircuitOpenError
+from torchlight.Config import Config
+from torchlight.Utils import Utils
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def get_host(url: str) -> str:
+    return urlparse(url).hostname or url
+
+
+@dataclass
+class HostLimit:
+    breaker: CircuitBreaker
+    semaphore: asyncio.Semaphore
+    active: int = 0
+
+
+class HTTPClient:
+    def __init__(self, config: Config) -> None:
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = config
+        self.session: aiohttp.ClientSession | None = None
+
+        cache_config = self.config.config.get("HTTP", {}).get("ResponseCache", {})
+        self.response_cache: TTLCache[tuple[str, str, str], tuple[int, str]] = TTLCache(
+            max_entries=int(cache_config.get("MaxEntries", 1024)),
+            max_bytes=int(cache_config.get("MaxBytes", 4 * 1024 * 1024)),
+            sizeof=lambda response: len(response[1]),
+        )
+        self.response_flight: SingleFlight[tuple[str, str, str], tuple[int, str]] = SingleFlight()
+
+        # Hosts come from whatever URL gets played, only the most recently used ones are remembered
+        self.host_limits: OrderedDict[str, HostLimit] = OrderedDict()
+        self.max_hosts = int(self.config.config.get("HTTP", {}).get("MaxHosts", 64))
+
+    @property
+    def proxy(self) -> str | None:
+        return self.config["VoiceServer"].get("Proxy", "") or None
+
+    def GetSession(self) -> aiohttp.ClientSession:
+        # The session has to be created from within the running event loop
+        if self.session is None or self.session.closed:
+            http_config = self.config.config.get("HTTP", {})
+            connector = aiohttp.TCPConnector(
+                limit=int(http_config.get("Limit", 64)),
+                limit_per_host=int(http_config.get("LimitPerHost", 8)),
+                use_dns_cache=True,
+                ttl_dns_cache=int(http_config.get("DNSCacheTTL", 300)),
+            )
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    def Get(self, url: str, **kwargs: Any) -> Any:
+        kwargs.setdefault("proxy", self.proxy)
+        return self.GetSession().get(url, **kwargs)
+
+    def GetHostLimit(self, host: str) -> HostLimit:
+        host_limit = self.host_limits.get(host)
+        if host_limit is not None:
+            self.host_limits.move_to_end(host)
+            return host_limit
+
+        http_config = self.config.config.get("HTTP", {})
+        host_limit = HostLimit(
+            breaker=CircuitBreaker(
+                failure_threshold=int(http_config.get("FailureThreshold", 5)),
+                reset_timeout=float(http_config.get("ResetTimeout", 30)),
+            ),
+            semaphore=asyncio.Semaphore(int(http_config.get("HostConcurrency", 4))),
+        )
+        self.host_limits[host] = host_limit
+
+        # Least recently used hosts go first, as long as no request is using them
+        for idle_host in [idle_host for idle_host, idle in self.host_limits.items() if not idle.active]:
+            if len(self.host_limits) <= self.max_hosts:
+                break
+            del self.host_limits[idle_host]
+        return host_limit
+
+    @contextlib.asynccontextmanager
+    async def Limit(self, host: str, timeout: float) -> AsyncIterator[None]:
+        host_limit = self.GetHostLimit(host)
+        breaker = host_limit.breaker
+        # Fail fast instead of having every caller wait out its timeout on a service that is down
+        if not breaker.Allow():
+            raise CircuitOpenError(f"{host} is not responding, try again later")
+
+        semaphore = host_limit.semaphore
+        host_limit.active += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout)
+        except BaseException:
+            host_limit.active -= 1
+            breaker.Release()
+            raise
+
+        try:
+            yield
+        except (asyncio.TimeoutError, aiohttp.ClientConnectionError):
+            breaker.RecordFailure()
+            raise
+        except Exception:
+            # The service answered, whatever went wrong afterwards isn't its health
+            breaker.RecordSuccess()
+            raise
+        except BaseException:
+            breaker.Release()
+            raise
+        else:
+            breaker.RecordSuccess()
+        finally:
+            semaphore.release()
+            host_limit.active -= 1
+
+    @contextlib.asynccontextmanager
+    async def Request(self, url: str, *, timeout: float = 5.0, **kwargs: Any) -> AsyncIterator[aiohttp.ClientResponse]:
+        async with self.Limit(get_host(url), timeout):
+            resp = await asyncio.wait_for(self.Get(url, **kwargs), timeout)
+            async with resp:
+                yield resp
+
+    async def GetCached(
+        self,
+        api: str,
+        url: str,
+        *,
+        params: dict[str, str] | None = None,
+        cache_key: str | None = None,
+        timeout: float = 5.0,
+    ) -> tuple[int, str]:
+        # The request goes out as given, cache_key only decides which requests share a response
+        if cache_key is not None:
+            key = (api, "", cache_key)
+        else:
+            key = (api, url, str(sorted((params or {}).items())))
+
+        response = self.response_cache.Get(key)
+        if response is not None:
+            return response
+
+        return await self.response_flight.Do(key, lambda: self._get_cached(key, url, params, timeout))
+
+    async def _get_cached(
+        self, key: tuple[str, str, str], url: str, params: dict[str, str] | None, timeout: float
+    ) -> tuple[int, str]:
+        cache_config = self.config.config.get("HTTP", {}).get("ResponseCache", {})
+        api = key[0]
+
+        async with self.Request(url, params=params, timeout=timeout) as resp:
+            response = (resp.status, await asyncio.wait_for(resp.text(), timeout))
+
+        # Rate limits and server errors are over soon, only answers about the query itself are cached
+        if resp.status == 429 or resp.status >= 500:
+            return response
+
+        # Errors like an unknown city are cached too, only for a shorter time
+        if resp.status < 400:
+            ttl = float(cache_config.get("TTL", {}).get(api, 300))
+        else:
+            ttl = float(cache_config.get("NegativeTTL", 60))
+        self.response_cache.Set(key, response, ttl=ttl)
+        return response
+
+    def Summary(self) -> list[str]:
+        lines: list[str] = []
+        if self.response_cache.hits + self.response_cache.misses:
+            lines.append(
+                f"[HTTP] response cache {len(self.response_cache)} entries"
+                f" ({Utils.HumanSize(self.response_cache.size)}), {self.response_cache.HitRate():.0%} hits"
+            )
+        # Every host that went through Limit and hasn't been evicted since, at most HTTP.MaxHosts
+        for host, host_limit in sorted(self.host_limits.items()):
+            lines.append(f"[HTTP] {host}: {host_limit.breaker}, {host_limit.active} in flight")
+        return lines
+
+    def Shutdown(self) -> None:
+        if self.session is None or self.session.closed:
+            return
+
+        session = self.session
+        self.session = None
+        try:
+            loop = asyncio.get_event_loop()
+            # Only a stopped loop can wait for the close, a task scheduled on a running one may never get to run
+            if loop.is_running():
+                loop.create_task(session.close())
+            else:
+                loop.run_until_complete(session.close())
+        except Exception as exc:
+            self.logger.warning(exc)
@@ -1,52 +1,148 @@
+import asyncio
+import hashlib
+import logging
+import os
 import re
 import secrets
+import tempfile
 from urllib.parse import urljoin
 
-import requests
-from bs4 import BeautifulSoup
+import aiohttp
+
+from torchlight.Cache import DiskCache, SingleFlight, TTLCache
+from torchlight.Config import Config
+from torchlight.HTTPClient import HTTPClient, normalize_query
 
 MYINSTANTS_URL = "https://www.myinstants.com"
 
 HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
 
+mp3_regex = re.compile(rb"play\('([^'<>]+?\.mp3)'")
+
+# Longest match we expect, carried over between chunks so that paths split by a chunk boundary are still found
+MAX_PATH_BYTES = 512
+
+
+async def read_mp3_paths(stream: aiohttp.StreamReader) -> list[str]:
+    mp3_paths: list[str] = []
+    seen: set[str] = set()
+    buffer = b""
+
+    while True:
+        chunk = await stream.read(65536)
+        buffer += chunk
+
+        end = 0
+        for match in mp3_regex.finditer(buffer):
+            path = match.group(1).decode("utf-8", errors="ignore")
+            if path not in seen:
+                seen.add(path)
+                mp3_paths.append(path)
+            end = match.end()
 
-def myinstants_get_random_sound(query: str | None, proxy: str | None) -> str | None:
-    if not query:
-        search_url = f"{MYINSTANTS_URL}/en/index/us/"
-    else:
-        search_url = f"{MYINSTANTS_URL}/en/search/"
+        if not chunk:
+            return mp3_paths
+        buffer = buffer[max(end, len(buffer) - MAX_PATH_BYTES) :]
 
-    proxies = None
-    if proxy:
-        proxies = {
-            "http": proxy,
-            "https": proxy,
-        }
 
-    try:
-        r = requests.get(
-            search_url, headers=HEADERS, params={"name": query} if query else None, timeout=10, proxies=proxies
+def get_sound_key(mp3_url: str) -> str:
+    return f"{hashlib.sha256(mp3_url.encode()).hexdigest()}.mp3"
+
+
+class MyInstants:
+    def __init__(self, config: Config, http_client: HTTPClient) -> None:
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = config
+        self.http_client = http_client
+
+        myinstants_config = self.config.config.get("MyInstants", {})
+        self.query_ttl = float(myinstants_config.get("QueryTTL", 3600))
+        self.index_ttl = float(myinstants_config.get("IndexTTL", 600))
+        self.max_sound_bytes = int(myinstants_config.get("MaxSoundBytes", 2 * 1024 * 1024))
+
+        self.search_cache: TTLCache[str, list[str]] = TTLCache(
+            max_entries=int(myinstants_config.get("CacheSize", 256)), ttl=self.query_ttl
+        )
+        self.search_flight: SingleFlight[str, list[str]] = SingleFlight()
+        self.sound_flight: SingleFlight[str, bytes | None] = SingleFlight()
+        self.sound_cache = DiskCache(
+            path=myinstants_config.get("CachePath", os.path.join(tempfile.gettempdir(), "torchlight", "myinstants")),
+            max_bytes=int(myinstants_config.get("CacheBytes", 128 * 1024 * 1024)),
         )
-    except requests.RequestException:
-        return None
 
-    if r.status_code != 200:
-        return None
+    async def Search(self, query: str | None) -> list[str]:
+        # The index page serves the random picks when there is no query
+        key = normalize_query(query) if query else ""
+
+        mp3_urls = self.search_cache.Get(key)
+        if mp3_urls is not None:
+            return mp3_urls
+
+        return await self.search_flight.Do(key, lambda: self._search(key))
+
+    async def _search(self, key: str) -> list[str]:
+        if not key:
+            search_url = f"{MYINSTANTS_URL}/en/index/us/"
+            params = None
+        else:
+            search_url = f"{MYINSTANTS_URL}/en/search/"
+            params = {"name": key}
+
+        async with self.http_client.Request(search_url, headers=HEADERS, params=params, timeout=10) as resp:
+            if resp.status != 200:
+                return []
+            mp3_paths = await asyncio.wait_for(read_mp3_paths(resp.content), 10)
+
+        mp3_urls = [urljoin(MYINSTANTS_URL, mp3_path) for mp3_path in mp3_paths]
+        # No results are cached as well, the same typo tends to get repeated
+        self.search_cache.Set(key, mp3_urls, ttl=self.query_ttl if key else self.index_ttl)
+        return mp3_urls
+
+    async def GetRandomSound(self, query: str | None) -> str | None:
+        try:
+            mp3_urls = await self.Search(query)
+        except Exception as exc:
+            self.logger.warning(f"Unable to search myinstants for {query}: {exc}")
+            return None
+
+        if not mp3_urls:
+            return None
+        return secrets.choice(mp3_urls)
+
+    async def GetCachedSound(self, mp3_url: str) -> bytes | None:
+        return await asyncio.get_running_loop().run_in_executor(None, self.sound_cache.Get, get_sound_key(mp3_url))
+
+    def Prefetch(self, mp3_url: str) -> None:
+        asyncio.ensure_future(self.GetSound(mp3_url))
+
+    async def GetSound(self, mp3_url: str) -> bytes | None:
+        data = await self.GetCachedSound(mp3_url)
+        if data is not None:
+            return data
 
-    soup = BeautifulSoup(r.text, "html.parser")
+        key = get_sound_key(mp3_url)
+        return await self.sound_flight.Do(key, lambda: self._download_sound(key, mp3_url))
 
-    buttons = soup.find_all("button", onclick=True)
-    mp3_paths = []
+    async def _download_sound(self, key: str, mp3_url: str) -> bytes | None:
+        try:
+            async with self.http_client.Request(mp3_url, headers=HEADERS, timeout=10) as resp:
+                if resp.status != 200 or (resp.content_length or 0) > self.max_sound_bytes:
+                    return None
+                data = await asyncio.wait_for(resp.content.read(self.max_sound_bytes + 1), 10)
+        except Exception as exc:
+            self.logger.debug(f"Unable to download {mp3_url}: {exc}")
+            return None
 
-    for btn in buttons:
-        onclick_value = btn["onclick"]
-        if "play(" in onclick_value:
-            match = re.search(r"play\('(.+?\.mp3)'", onclick_value)
-            if match:
-                mp3_paths.append(match.group(1))
+        if len(data) > self.max_sound_bytes:
+            return None
 
-    if not mp3_paths:
-        return None
+        await asyncio.get_running_loop().run_in_executor(None, self.sound_cache.Set, key, data)
+        return data
 
-    mp3_url = urljoin(MYINSTANTS_URL, secrets.choice(mp3_paths))
-    return mp3_url
+    def Summary(self) -> list[str]:
+        if not self.search_cache.hits + self.search_cache.misses:
+            return []
+        return [
+            f"[MyInstants] search cache {self.search_cache.HitRate():.0%} hits"
+            f", sound cache {self.sound_cache.HitRate():.0%} hits"
+        ]
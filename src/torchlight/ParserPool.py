@@ -0,0 +1,115 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.queues import SimpleQueue
+from typing import Any, TypeVar
+
+from torchlight.Config import Config
+from torchlight.ProcessStats import TimingTotals
+
+T = TypeVar("T")
+
+
+class ParserError(Exception):
+    pass
+
+
+def get_payload_size(*args: Any) -> int:
+    return sum(len(arg) for arg in args if isinstance(arg, bytes | bytearray | str))
+
+
+def record_worker(worker_pids: SimpleQueue) -> None:
+    worker_pids.put(os.getpid())
+
+
+class ParserPool:
+    def __init__(self, config: Config) -> None:
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = config
+        self.executor: ProcessPoolExecutor | None = None
+        self.worker_pids: SimpleQueue | None = None
+
+        parsing_config = self.config.config.get("Parsing", {})
+        self.workers = int(parsing_config.get("Workers", 2))
+        self.max_bytes = int(parsing_config.get("MaxBytes", 1024 * 1024))
+        self.timeout = float(parsing_config.get("Timeout", 2))
+        # Jobs beyond this are turned away instead of piling up behind a slow parse
+        self.semaphore = asyncio.Semaphore(int(parsing_config.get("MaxPending", 8)))
+
+        self.parse_times = TimingTotals()
+        self.rejected_total = 0
+        self.timeouts_total = 0
+
+    def GetExecutor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            # Forking the bot itself would copy its threads and sockets into every worker
+            context = multiprocessing.get_context("forkserver")
+            # Workers report their pid on startup so that a stuck one can be killed
+            self.worker_pids = context.SimpleQueue()
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=record_worker,
+                initargs=(self.worker_pids,),
+            )
+        return self.executor
+
+    def Restart(self, executor: ProcessPoolExecutor) -> None:
+        if self.executor is not executor:
+            return
+        self.executor = None
+        worker_pids, self.worker_pids = self.worker_pids, None
+
+        # A worker stuck inside a parser can't be cancelled, only killed
+        while worker_pids is not None and not worker_pids.empty():
+            try:
+                os.kill(worker_pids.get(), signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def Run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if get_payload_size(*args, *kwargs.values()) > self.max_bytes:
+            self.rejected_total += 1
+            raise ParserError("Content is too large to parse")
+
+        if self.semaphore.locked():
+            self.rejected_total += 1
+            raise ParserError("Too busy to parse this right now")
+
+        async with self.semaphore:
+            executor = self.GetExecutor()
+            started = time.monotonic()
+            try:
+                result = await asyncio.wait_for(
+                    asyncio.get_running_loop().run_in_executor(executor, functools.partial(func, *args, **kwargs)),
+                    self.timeout,
+                )
+            except asyncio.TimeoutError:
+                self.timeouts_total += 1
+                self.logger.warning(f"{func.__qualname__} took longer than {self.timeout}s, restarting the workers")
+                self.Restart(executor)
+                raise ParserError("Took too long to parse") from None
+            except BrokenProcessPool:
+                self.Restart(executor)
+                raise ParserError("Parser crashed") from None
+
+            self.parse_times.Add(time.monotonic() - started)
+            return result
+
+    def Summary(self) -> list[str]:
+        if not self.parse_times.count + self.rejected_total + self.timeouts_total:
+            return []
+        return [f"[Parsing] {self.parse_times}, {self.rejected_total} rejected, {self.timeouts_total} timed out"]
+
+    def Shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
@@ -0,0 +1,89 @@
+import codecs
+import re
+from html.parser import HTMLParser
+
+import defusedxml.ElementTree as etree
+
+# Run in the parser pool, anything imported here is imported by every worker as well
+
+# Browsers look for a <meta> charset within the first 1024 bytes as well
+CHARSET_SNIFF_BYTES = 1024
+
+meta_charset_regex = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_:.\-]+)""", re.IGNORECASE)
+header_charset_regex = re.compile(r"""charset\s*=\s*["']?([a-zA-Z0-9_:.\-]+)""", re.IGNORECASE)
+
+
+def get_charset(content_type: str, head: bytes) -> str:
+    for bom, charset in (
+        (codecs.BOM_UTF8, "utf-8-sig"),
+        (codecs.BOM_UTF16_LE, "utf-16"),
+        (codecs.BOM_UTF16_BE, "utf-16"),
+    ):
+        if head.startswith(bom):
+            return charset
+
+    candidates: list[str] = []
+    if header_match := header_charset_regex.search(content_type):
+        candidates.append(header_match.group(1))
+    if meta_match := meta_charset_regex.search(head[:CHARSET_SNIFF_BYTES]):
+        candidates.append(meta_match.group(1).decode("ascii"))
+
+    for candidate in candidates:
+        try:
+            return codecs.lookup(candidate).name
+        except LookupError:
+            continue
+    return "utf-8"
+
+
+class TitleExtractor(HTMLParser):
+    def __init__(self) -> None:
+        # Entities are decoded by the parser before the text reaches handle_data
+        super().__init__(convert_charrefs=True)
+        self.in_title = False
+        self.done = False
+        self.parts: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag == "title" and not self.done:
+            self.in_title = True
+        # The page title lives in <head>, a <title> in the body belongs to something like an inline <svg>
+        elif tag == "body" and not self.in_title:
+            self.done = True
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "title" and self.in_title:
+            self.in_title = False
+            self.done = True
+
+    def handle_data(self, data: str) -> None:
+        if self.in_title:
+            self.parts.append(data)
+
+    @property
+    def title(self) -> str | None:
+        title = " ".join("".join(self.parts).split())
+        return title or None
+
+    @classmethod
+    def FromContent(cls, content: bytes, content_type: str) -> str | None:
+        extractor = cls()
+        extractor.feed(content.decode(get_charset(content_type, content), errors="replace"))
+        extractor.close()
+        return extractor.title
+
+
+def parse_wolfram_pods(data: str) -> tuple[list[str], list[str | None]]:
+    root = etree.fromstring(data)
+
+    # Find all pods with plaintext answers
+    # Filter out None -answers, strip strings and filter out the empty ones
+    pods: list[str] = list(
+        filter(
+            None,
+            [p.text.strip() for p in root.findall(".//subpod/plaintext") if p is not None and p.text is not None],
+        )
+    )
+
+    did_you_means = root.find("didyoumeans")
+    return pods, [did_you_mean.text for did_you_mean in did_you_means] if did_you_means is not None else []
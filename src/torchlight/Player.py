@@ -29,6 +29,8 @@ class Player:
         self.active = False
         self.chat_cooldown = 0
         self.myinstants_cooldown: float = 0.0
+        self.suggest_cooldown: float = 0.0
+        self.location: tuple[float, float] | None = None
 
     def OnConnect(self) -> None:
         if "Audio" not in self.storage:
@@ -58,6 +58,7 @@ class PlayerManager:
             self.logger.error("!!! Player already exists, overwriting !!!")
 
         player = Player(index, userid, networkid, address, name)
+        player.location = self.torchlight.geoip.Locate(address)
 
         admin_override = self.access_manager.get_admin(unique_id=player.unique_id)
         if admin_override is not None:
@@ -0,0 +1,159 @@
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+from torchlight.Utils import Utils
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+MAX_URI_ENTRIES = 256
+
+
+@dataclass
+class ProcessSample:
+    cpu_time: float
+    rss: int
+    peak_rss: int
+
+
+@dataclass
+class ProcessUsage:
+    cpu_time: float = 0.0
+    peak_rss: int = 0
+
+    def Update(self, sample: ProcessSample) -> None:
+        # utime/stime are cumulative for the lifetime of the process
+        self.cpu_time = max(self.cpu_time, sample.cpu_time)
+        self.peak_rss = max(self.peak_rss, sample.peak_rss)
+
+
+@dataclass
+class UsageTotals:
+    clips: int = 0
+    cpu_time: float = 0.0
+    peak_rss: int = 0
+
+    def Add(self, cpu_time: float, peak_rss: int) -> None:
+        self.clips += 1
+        self.cpu_time += cpu_time
+        self.peak_rss = max(self.peak_rss, peak_rss)
+
+    def __str__(self) -> str:
+        return (
+            f"{self.clips} clips, {self.cpu_time:.2f}s cpu"
+            f" ({self.cpu_time / max(self.clips, 1):.2f}s avg), peak {Utils.HumanSize(self.peak_rss)}"
+        )
+
+
+@dataclass
+class TimingTotals:
+    count: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+
+    def Add(self, seconds: float) -> None:
+        self.count += 1
+        self.total_time += seconds
+        self.max_time = max(self.max_time, seconds)
+
+    def __str__(self) -> str:
+        return f"{self.count}x, {self.total_time / max(self.count, 1):.2f}s avg, {self.max_time:.2f}s max"
+
+
+def read_process_sample(pid: int) -> ProcessSample | None:
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as fp:
+            stat = fp.read()
+        with open(f"/proc/{pid}/status", "rb") as fp:
+            status = fp.read()
+    except OSError:
+        return None
+
+    # comm (field 2) may contain spaces and parentheses, the remaining fields start after the last ')'
+    fields = stat[stat.rfind(b")") + 2 :].split()
+    if len(fields) < 13:
+        return None
+
+    # utime and stime are fields 14 and 15 of /proc/<pid>/stat
+    cpu_time = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+    rss = 0
+    peak_rss = 0
+    for line in status.splitlines():
+        if line.startswith(b"VmRSS:"):
+            rss = int(line.split()[1]) * 1024
+        elif line.startswith(b"VmHWM:"):
+            peak_rss = int(line.split()[1]) * 1024
+
+    return ProcessSample(cpu_time=cpu_time, rss=rss, peak_rss=max(rss, peak_rss))
+
+
+def get_source_type(uri: str) -> str:
+    parsed = urlparse(uri)
+    if parsed.scheme == "file":
+        return "file"
+
+    hostname = parsed.hostname or ""
+    if hostname.endswith(("googlevideo.com", "youtube.com", "youtu.be")):
+        return "youtube"
+    if hostname.endswith("myinstants.com"):
+        return "myinstants"
+
+    return parsed.scheme or "unknown"
+
+
+def get_filter_graph(ffmpeg_command: list[str]) -> str:
+    # -af is an alias of -filter:a, the last one on the command line wins
+    graph = ""
+    for index, arg in enumerate(ffmpeg_command[:-1]):
+        if arg in ("-filter:a", "-af"):
+            graph = ffmpeg_command[index + 1]
+
+    # Aggregate on the filter chain itself, not on its parameters
+    return ",".join(node.split("=", 1)[0] for node in graph.split(",") if node) or "none"
+
+
+class ProcessAccounting:
+    def __init__(self) -> None:
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.by_filter_graph: dict[str, UsageTotals] = {}
+        self.by_source_type: dict[str, UsageTotals] = {}
+        self.by_player: dict[str, UsageTotals] = {}
+        self.by_uri: OrderedDict[str, UsageTotals] = OrderedDict()
+
+    def Record(
+        self,
+        *,
+        player_id: str,
+        uri: str,
+        filter_graph: str,
+        source_type: str,
+        usage: dict[str, ProcessUsage],
+    ) -> None:
+        cpu_time = sum(process_usage.cpu_time for process_usage in usage.values())
+        peak_rss = sum(process_usage.peak_rss for process_usage in usage.values())
+
+        self.by_filter_graph.setdefault(filter_graph, UsageTotals()).Add(cpu_time, peak_rss)
+        self.by_source_type.setdefault(source_type, UsageTotals()).Add(cpu_time, peak_rss)
+        self.by_player.setdefault(player_id, UsageTotals()).Add(cpu_time, peak_rss)
+
+        if uri not in self.by_uri:
+            self.by_uri[uri] = UsageTotals()
+            if len(self.by_uri) > MAX_URI_ENTRIES:
+                self.by_uri.popitem(last=False)
+        self.by_uri.move_to_end(uri)
+        self.by_uri[uri].Add(cpu_time, peak_rss)
+
+    def Summary(self) -> list[str]:
+        lines: list[str] = []
+        for title, totals, count in (
+            ("Filter graph", self.by_filter_graph, 5),
+            ("Source type", self.by_source_type, 5),
+            ("Player", self.by_player, 3),
+            ("URI", self.by_uri, 3),
+        ):
+            ranked = sorted(totals.items(), key=lambda item: item[1].cpu_time, reverse=True)
+            for key, total in ranked[:count]:
+                lines.append(f"[{title}] {key}: {total}")
+        return lines
@@ -0,0 +1,39 @@
+import os
+from collections.abc import Iterable
+
+NGRAM_SIZE = 3
+
+
+def get_ngrams(text: str) -> set[str]:
+    return {text[i : i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def get_candidates(postings: dict[str, list[int]], search: str, count: int) -> Iterable[int]:
+    if len(search) < NGRAM_SIZE:
+        return range(count)
+
+    # Everything containing the search contains all of its ngrams, start from the rarest one
+    ngram_postings = sorted((postings.get(ngram, []) for ngram in get_ngrams(search)), key=len)
+    return sorted(set(ngram_postings[0]).intersection(*ngram_postings[1:]))
+
+
+class SoundIndex:
+    def __init__(self, sounds: list[str]) -> None:
+        self.sounds = sounds
+        self.names = [os.path.splitext(os.path.basename(sound))[0] for sound in sounds]
+        self.lower_names = [name.lower() for name in self.names]
+
+        self.postings: dict[str, list[int]] = {}
+        for index, lower_name in enumerate(self.lower_names):
+            for ngram in get_ngrams(lower_name):
+                self.postings.setdefault(ngram, []).append(index)
+
+    def Search(self, search: str) -> list[int]:
+        if not search:
+            return []
+
+        candidates = get_candidates(self.postings, search, len(self.lower_names))
+        matches = [index for index in candidates if search in self.lower_names[index]]
+        # Shortest name first, it's the closest to what was typed
+        matches.sort(key=lambda index: len(self.names[index]))
+        return matches
@@ -0,0 +1,54 @@
+def get_edit_distance(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def get_deletes(word: str, max_distance: int) -> set[str]:
+    deletes = {word}
+    variants = {word}
+    for _ in range(max_distance):
+        variants = {variant[:i] + variant[i + 1 :] for variant in variants for i in range(len(variant))}
+        deletes |= variants
+    return deletes
+
+
+class SuggestionIndex:
+    def __init__(self, max_distance: int) -> None:
+        self.max_distance = max_distance
+        self.words: set[str] = set()
+        # Words within max_distance of each other always share a variant with up to max_distance characters deleted
+        self.deletes: dict[str, list[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def Add(self, word: str) -> None:
+        if word in self.words:
+            return
+
+        self.words.add(word)
+        for delete in get_deletes(word, self.max_distance):
+            self.deletes.setdefault(delete, []).append(word)
+
+    def Search(self, word: str, max_distance: int) -> list[tuple[int, str]]:
+        max_distance = min(max_distance, self.max_distance)
+
+        candidates: set[str] = set()
+        for delete in get_deletes(word, max_distance):
+            candidates.update(self.deletes.get(delete, []))
+
+        matches = [
+            (distance, candidate)
+            for candidate in candidates
+            if (distance := get_edit_distance(word, candidate)) <= max_distance
+        ]
+        matches.sort()
+        return matches
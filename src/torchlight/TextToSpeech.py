@@ -0,0 +1,268 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import time
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import gtts
+
+from torchlight.Cache import DiskCache, SingleFlight, TTLCache
+from torchlight.Config import Config
+from torchlight.ProcessStats import TimingTotals
+
+
+def get_tts_key(text: str, language: str, tld: str) -> str:
+    return hashlib.sha256(f"{language}\0{tld}\0{text}".encode()).hexdigest()
+
+
+def get_dectalk_key(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def google_synthesize(text: str, language: str, tld: str) -> bytes:
+    fp = io.BytesIO()
+    gtts.gTTS(text=text, tld=tld, lang=language, lang_check=False).write_to_fp(fp)
+    return fp.getvalue()
+
+
+def google_tokenize(text: str, language: str, tld: str) -> list[str]:
+    # Same split gTTS does internally, one request per part
+    return gtts.gTTS(text=text, tld=tld, lang=language, lang_check=False)._tokenize(text)
+
+
+@dataclass
+class DECTalkSynthesis:
+    chunks: list[bytes] = field(default_factory=list)
+    done: bool = False
+    updated: asyncio.Event = field(default_factory=asyncio.Event)
+    listeners: int = 0
+    task: asyncio.Future[None] | None = None
+
+    def Add(self, chunk: bytes) -> None:
+        self.chunks.append(chunk)
+        self.Notify()
+
+    def Finish(self) -> None:
+        self.done = True
+        self.Notify()
+
+    def Notify(self) -> None:
+        updated, self.updated = self.updated, asyncio.Event()
+        updated.set()
+
+
+class TextToSpeech:
+    def __init__(self, config: Config) -> None:
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = config
+
+        tts_config = self.config.config.get("TTS", {})
+        self.chunk_concurrency = int(tts_config.get("ChunkConcurrency", 3))
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(tts_config.get("Workers", 4)),
+            thread_name_prefix="TextToSpeech",
+        )
+        self.memory_cache: TTLCache[str, bytes] = TTLCache(
+            max_entries=int(tts_config.get("MemoryCacheEntries", 256)),
+            ttl=float(tts_config.get("MemoryCacheTTL", 3600)),
+            max_bytes=int(tts_config.get("MemoryCacheBytes", 8 * 1024 * 1024)),
+            sizeof=len,
+        )
+        self.disk_cache = DiskCache(
+            path=tts_config.get("DiskCachePath", os.path.join(tempfile.gettempdir(), "torchlight", "tts")),
+            max_bytes=int(tts_config.get("DiskCacheBytes", 256 * 1024 * 1024)),
+        )
+        self.part_flight: SingleFlight[str, bytes] = SingleFlight()
+        self.gtts_first_times = TimingTotals()
+        self.gtts_times = TimingTotals()
+
+        dectalk_config = self.config.config.get("DECTalk", {})
+        self.dectalk_semaphore = asyncio.Semaphore(max(int(dectalk_config.get("Workers", 2)), 1))
+        self.dectalk_timeout = float(dectalk_config.get("Timeout", 30))
+        self.dectalk_cache = DiskCache(
+            path=dectalk_config.get("CachePath", os.path.join(tempfile.gettempdir(), "torchlight", "dectalk")),
+            max_bytes=int(dectalk_config.get("CacheBytes", 128 * 1024 * 1024)),
+        )
+        self.dectalk_times = TimingTotals()
+        self.dectalk_running: dict[str, DECTalkSynthesis] = {}
+
+    async def Stream(self, text: str, language: str, tld: str) -> AsyncIterator[bytes]:
+        key = get_tts_key(text, language, tld)
+
+        data = self.memory_cache.Get(key)
+        if data is None:
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(self.executor, self.disk_cache.Get, f"{key}.mp3")
+        if data is not None:
+            self.memory_cache.Set(key, data)
+            return self._iterate_data(data)
+
+        parts = google_tokenize(text, language, tld)
+        if not parts:
+            raise ValueError("No text to speak")
+
+        self.logger.debug(f"Synthesizing [{language}.{tld}] {text} in {len(parts)} parts")
+        semaphore = asyncio.Semaphore(max(self.chunk_concurrency, 1))
+
+        async def synthesize(part: str) -> bytes:
+            async with semaphore:
+                # The same message spammed by several players downloads each part once
+                return await self.part_flight.Do(
+                    get_tts_key(part, language, tld),
+                    lambda: asyncio.get_running_loop().run_in_executor(
+                        self.executor, google_synthesize, part, language, tld
+                    ),
+                )
+
+        started = time.monotonic()
+        tasks = [asyncio.create_task(synthesize(part)) for part in parts]
+        try:
+            # Errors for the first part still reach the caller before anything is played
+            first = await tasks[0]
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        self.gtts_first_times.Add(time.monotonic() - started)
+
+        return self._iterate_parts(key, first, tasks[1:], started)
+
+    async def _iterate_data(self, data: bytes) -> AsyncIterator[bytes]:
+        yield data
+
+    async def _iterate_parts(
+        self, key: str, first: bytes, tasks: list[asyncio.Task[bytes]], started: float
+    ) -> AsyncIterator[bytes]:
+        chunks = [first]
+        try:
+            yield first
+            # Later parts keep downloading while the earlier ones are being played
+            for task in tasks:
+                chunk = await task
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        self.gtts_times.Add(time.monotonic() - started)
+        data = b"".join(chunks)
+        self.memory_cache.Set(key, data)
+        asyncio.get_running_loop().run_in_executor(self.executor, self.disk_cache.Set, f"{key}.mp3", data)
+
+    async def StreamDECTalk(self, text: str) -> AsyncIterator[bytes]:
+        key = get_dectalk_key(text)
+
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(self.executor, self.dectalk_cache.Get, f"{key}.wav")
+        if data is not None:
+            return self._iterate_data(data)
+
+        synthesis = self.dectalk_running.get(key)
+        if synthesis is None:
+            dectalk_config = self.config.config.get("DECTalk", {})
+            dectalk_path = os.path.abspath(dectalk_config.get("Path", "dectalk"))
+            dectalk_say_path = os.path.abspath(os.path.join(dectalk_path, dectalk_config.get("SayFilename", "say")))
+            if not os.access(dectalk_say_path, os.X_OK):
+                raise FileNotFoundError(f"{dectalk_say_path} is not executable")
+
+            synthesis = DECTalkSynthesis()
+            self.dectalk_running[key] = synthesis
+            synthesis.task = asyncio.ensure_future(
+                self._synthesize_dectalk(key, text, dectalk_path, dectalk_say_path, synthesis)
+            )
+
+        # Everyone asking for the same text while say is running listens to the same process
+        return self._iterate_synthesis(synthesis)
+
+    async def _iterate_synthesis(self, synthesis: DECTalkSynthesis) -> AsyncIterator[bytes]:
+        synthesis.listeners += 1
+        try:
+            position = 0
+            while True:
+                updated = synthesis.updated
+                while position < len(synthesis.chunks):
+                    yield synthesis.chunks[position]
+                    position += 1
+                if synthesis.done:
+                    return
+                await updated.wait()
+        finally:
+            synthesis.listeners -= 1
+            # Everyone stopped listening early, don't keep a synthesizer busy for nothing
+            if not synthesis.listeners and not synthesis.done and synthesis.task is not None:
+                synthesis.task.cancel()
+
+    async def _synthesize_dectalk(
+        self, key: str, text: str, cwd: str, say_path: str, synthesis: DECTalkSynthesis
+    ) -> None:
+        try:
+            # Bursts of !dec wait for a free synthesizer instead of forking one each
+            async with self.dectalk_semaphore:
+                started = time.monotonic()
+                # The wave data is read from a pipe so that playback starts while say is still synthesizing
+                process = await asyncio.create_subprocess_exec(
+                    say_path,
+                    "-fo",
+                    "/dev/stdout",
+                    cwd=cwd,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL,
+                )
+                try:
+                    await asyncio.wait_for(self._read_dectalk(process, text, synthesis), self.dectalk_timeout)
+                finally:
+                    # A hung or abandoned synthesizer would hold its slot forever
+                    if process.returncode is None:
+                        try:
+                            process.kill()
+                        except ProcessLookupError:
+                            pass
+                    await process.wait()
+
+            if process.returncode == 0:
+                self.dectalk_times.Add(time.monotonic() - started)
+                await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self.dectalk_cache.Set, f"{key}.wav", b"".join(synthesis.chunks)
+                )
+        except asyncio.TimeoutError:
+            self.logger.error(f"DECTalk synthesis took longer than {self.dectalk_timeout}s")
+        except Exception as exc:
+            self.logger.error(f"DECTalk synthesis failed: {exc}")
+        finally:
+            del self.dectalk_running[key]
+            synthesis.Finish()
+
+    async def _read_dectalk(self, process: asyncio.subprocess.Process, text: str, synthesis: DECTalkSynthesis) -> None:
+        if process.stdin is not None:
+            process.stdin.write(text.encode("utf-8", errors="ignore"))
+            process.stdin.close()
+
+        while process.stdout is not None:
+            chunk = await process.stdout.read(65536)
+            if not chunk:
+                break
+            synthesis.Add(chunk)
+        await process.wait()
+
+    def Summary(self) -> list[str]:
+        lines: list[str] = []
+        if self.memory_cache.hits + self.memory_cache.misses:
+            lines.append(
+                f"[TTS] gTTS memory cache {self.memory_cache.HitRate():.0%} hits"
+                f", disk cache {self.disk_cache.HitRate():.0%} hits"
+            )
+            lines.append(f"[TTS] gTTS first audio: {self.gtts_first_times}")
+            lines.append(f"[TTS] gTTS complete: {self.gtts_times}")
+        if self.dectalk_cache.hits + self.dectalk_cache.misses:
+            lines.append(f"[TTS] DECTalk: {self.dectalk_times}, cache {self.dectalk_cache.HitRate():.0%} hits")
+        return lines
+
+    def Shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -8,10 +8,19 @@ from collections.abc import Callable
 from typing import TYPE_CHECKING, Any
 
 from torchlight.AsyncClient import AsyncClient
+from torchlight.Cache import SingleFlight, TTLCache
 from torchlight.Config import Config
+from torchlight.GeoIP import GeoIP
+from torchlight.HTTPClient import HTTPClient
+from torchlight.MyInstants import MyInstants
+from torchlight.ParserPool import ParserPool
 from torchlight.Player import Player
+from torchlight.ProcessStats import ProcessAccounting
 from torchlight.SourceModAPI import SourceModAPI
 from torchlight.Subscribe import Forwards, GameEvents
+from torchlight.TextToSpeech import TextToSpeech
+from torchlight.Translator import Translator
+from torchlight.YouTubeExtractor import YouTubeExtractor
 
 if TYPE_CHECKING:
     from .CommandHandler import CommandHandler
@@ -36,6 +45,21 @@ class Torchlight:
         self.sourcemod_api = SourceModAPI(self.async_client)
         self.game_events = GameEvents(self.async_client)
         self.forwards = Forwards(self.async_client)
+        self.process_accounting = ProcessAccounting()
+        self.http_client = HTTPClient(self.config)
+
+        url_config = self.config.config.get("URLMetadata", {})
+        self.url_metadata_cache: TTLCache[str, str] = TTLCache(
+            max_entries=int(url_config.get("CacheSize", 512)),
+            ttl=float(url_config.get("CacheTTL", 600)),
+        )
+        self.url_flight: SingleFlight[tuple[str, str], str] = SingleFlight()
+        self.youtube_extractor = YouTubeExtractor(self.config, self.http_client)
+        self.text_to_speech = TextToSpeech(self.config)
+        self.translator = Translator(self.config)
+        self.myinstants = MyInstants(self.config, self.http_client)
+        self.geoip = GeoIP(self.config)
+        self.parser_pool = ParserPool(self.config)
 
         self.disable_votes: set = set()
         self.disabled = 0
@@ -48,6 +72,14 @@ class Torchlight:
         self.config.load()
         self.Callback("OnReload")
 
+    def Shutdown(self) -> None:
+        self.youtube_extractor.Shutdown()
+        self.text_to_speech.Shutdown()
+        self.translator.Shutdown()
+        self.geoip.Shutdown()
+        self.parser_pool.Shutdown()
+        self.http_client.Shutdown()
+
     def AddCallback(self, cbtype: str, cbfunc: Callable) -> bool:
         if cbtype not in self.VALID_CALLBACKS:
             return False
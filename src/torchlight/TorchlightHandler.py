@@ -76,6 +76,8 @@ class TorchlightHandler:
         self.player_manager.torchlight.command_handler = self.command_handler
 
     def InitModules(self) -> None:
+        self.torchlight.youtube_extractor.Start()
+
         self.player_manager.Setup()
 
         self.command_handler.Setup()
@@ -135,6 +137,7 @@ class TorchlightHandler:
     def OnDisconnect(self, exc: Exception | None) -> None:
         self.logger.info(f"OnDisconnect({exc})")
 
+        self.torchlight.Shutdown()
         self.Init()
 
         asyncio.ensure_future(self._Connect(), loop=self.loop)
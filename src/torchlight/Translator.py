@@ -0,0 +1,58 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from translatepy import Translate
+
+from torchlight.Cache import SingleFlight, TTLCache
+from torchlight.Config import Config
+from torchlight.ProcessStats import TimingTotals
+
+
+class Translator:
+    def __init__(self, config: Config) -> None:
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = config
+        self.translate = Translate()
+
+        translation_config = self.config.config.get("Translation", {})
+        # Translation services can hang for a long time, keep them away from the default executor
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(translation_config.get("Workers", 2)),
+            thread_name_prefix="Translator",
+        )
+        self.cache: TTLCache[tuple[str, str], str] = TTLCache(
+            max_entries=int(translation_config.get("CacheSize", 512)),
+            ttl=float(translation_config.get("CacheTTL", 86400)),
+        )
+        self.translate_flight: SingleFlight[tuple[str, str], str] = SingleFlight()
+        self.translate_times = TimingTotals()
+
+    def _translate(self, text: str, language: str) -> str:
+        return str(self.translate.translate(text, language).result)
+
+    async def Translate(self, text: str, language: str) -> str:
+        key = (text, language)
+
+        translated = self.cache.Get(key)
+        if translated is not None:
+            return translated
+
+        return await self.translate_flight.Do(key, lambda: self._translate_and_store(text, language))
+
+    async def _translate_and_store(self, text: str, language: str) -> str:
+        started = time.monotonic()
+        translated = await asyncio.get_running_loop().run_in_executor(self.executor, self._translate, text, language)
+        self.translate_times.Add(time.monotonic() - started)
+
+        self.cache.Set((text, language), translated)
+        return translated
+
+    def Summary(self) -> list[str]:
+        if not self.cache.hits + self.cache.misses:
+            return []
+        return [f"[Translation] {self.translate_times}, cache {self.cache.HitRate():.0%} hits"]
+
+    def Shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -3,7 +3,11 @@ import logging
 import os
 from collections import OrderedDict
 
+from torchlight.Cache import TTLCache
 from torchlight.Config import Config
+from torchlight.SoundIndex import SoundIndex
+from torchlight.SuggestionIndex import SuggestionIndex
+from torchlight.TriggerSearchIndex import SearchResults, TriggerSearchIndex
 
 
 class TriggerManager:
@@ -20,7 +24,16 @@ class TriggerManager:
         self.config_filepath = os.path.abspath(os.path.join(config_folder, config_filename))
         self.triggers_dict: OrderedDict = OrderedDict()
         self.voice_triggers: dict[str, dict[str, str | list[str] | dict[str, float]]] = {}
+        self.sound_indexes: dict[str, SoundIndex] = {}
         self.sound_path = self.config.config.get("Sounds", {}).get("Path", "sounds")
+        self.search_index = TriggerSearchIndex({}, {})
+        self.suggestion_index = SuggestionIndex(0)
+
+        search_config = self.config.config.get("TriggerSearch", {})
+        self.search_cache: TTLCache[str, SearchResults] = TTLCache(
+            max_entries=int(search_config.get("CacheSize", 64)),
+            ttl=float(search_config.get("CacheTTL", 600)),
+        )
 
     def Load(self) -> None:
         self.logger.info(f"Loading triggers from {self.config_filepath}")
@@ -35,6 +48,8 @@ class TriggerManager:
 
             self.triggers_dict = json.load(fp, object_pairs_hook=OrderedDict)
             for line in self.triggers_dict:
+                # Shared by all names of the line
+                sound_index = SoundIndex(line["sound"] if isinstance(line["sound"], list) else [line["sound"]])
                 for trigger in line["names"]:
                     config_sounds = line["sound"]
                     parameters: dict[str, float] | None = None
@@ -52,6 +67,7 @@ class TriggerManager:
                         "sounds": config_sounds,
                         "parameters": parameters if parameters else default_parameters,
                     }
+                    self.sound_indexes[trigger] = sound_index
 
                     sounds: list[str] = []
                     if isinstance(config_sounds, str):
@@ -63,3 +79,32 @@ class TriggerManager:
                         sound_path = os.path.abspath(os.path.join(self.sound_path, sound))
                         if not os.path.exists(sound_path):
                             self.logger.warning(f"Sound path {sound_path} does not exist")
+
+        self.search_index = TriggerSearchIndex(self.voice_triggers, self.sound_indexes)
+        self.search_cache.Clear()
+
+        # Only the public triggers, the others are reserved to admins
+        self.suggestion_index = SuggestionIndex(
+            int(self.config.config.get("TriggerSearch", {}).get("SuggestDistance", 2))
+        )
+        for trigger in self.voice_triggers:
+            if trigger.startswith("!"):
+                self.suggestion_index.Add(trigger.lower())
+
+    def Search(self, search: str) -> SearchResults:
+        # Menu page clicks repeat the same search, the pages are slices of the cached results
+        results = self.search_cache.Get(search)
+        if results is None:
+            results = self.search_index.Search(search)
+            self.search_cache.Set(search, results)
+        return results
+
+    def Suggest(self, trigger: str) -> list[str]:
+        search_config = self.config.config.get("TriggerSearch", {})
+        max_distance = int(search_config.get("SuggestDistance", 2))
+        # A couple of typos in a short name could be just about any other short name
+        if len(trigger) <= 5:
+            max_distance = min(max_distance, 1)
+
+        matches = self.suggestion_index.Search(trigger.lower(), max_distance)
+        return [word for _, word in matches[: int(search_config.get("SuggestCount", 3))]]
@@ -0,0 +1,46 @@
+import functools
+from dataclasses import dataclass
+from typing import Any
+
+from torchlight.SoundIndex import SoundIndex, get_candidates, get_ngrams
+
+
+@dataclass
+class SearchResults:
+    entries: list[str]
+
+    @functools.cached_property
+    def listing(self) -> str:
+        return ", ".join(self.entries)
+
+
+class TriggerSearchIndex:
+    def __init__(self, voice_triggers: dict[str, Any], sound_indexes: dict[str, SoundIndex]) -> None:
+        self.entries: list[str] = []
+        self.texts: list[tuple[str, ...]] = []
+        self.postings: dict[str, list[int]] = {}
+
+        for key, voice_trigger in voice_triggers.items():
+            lower_names = sound_indexes[key].lower_names
+            # Triggers with several sounds get an entry per sound, each found by the trigger or its sound name
+            if isinstance(voice_trigger["sounds"], list) and len(voice_trigger["sounds"]) > 1:
+                for number, lower_name in enumerate(lower_names, 1):
+                    self.Add(f"{key} {number}", key.lower(), lower_name)
+            else:
+                self.Add(key, key.lower(), *lower_names)
+
+    def Add(self, entry: str, *texts: str) -> None:
+        index = len(self.entries)
+        self.entries.append(entry)
+        self.texts.append(texts)
+        for ngram in set().union(*(get_ngrams(text) for text in texts)):
+            self.postings.setdefault(ngram, []).append(index)
+
+    def Search(self, search: str) -> SearchResults:
+        if not search:
+            return SearchResults(list(self.entries))
+
+        candidates = get_candidates(self.postings, search, len(self.entries))
+        return SearchResults(
+            [self.entries[index] for index in candidates if any(search in text for text in self.texts[index])]
+        )
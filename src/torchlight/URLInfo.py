@@ -2,24 +2,54 @@ import asyncio
 import io
 import json
 import logging
-from collections.abc import Callable
+import re
 from typing import Any
+from urllib.parse import parse_qs, urlparse
 
 import aiohttp
 import magic
 import yt_dlp
-from bs4 import BeautifulSoup
 from PIL import Image
 
+from torchlight.HTTPClient import HTTPClient
+from torchlight.ParserPool import ParserPool
+from torchlight.Parsers import TitleExtractor
 from torchlight.Utils import Utils
 
 logger = logging.getLogger(__name__)
 
+# Up to the closing >, the parser needs the whole end tag
+head_end_regex = re.compile(rb"</title\s*>|<body[\s>]", re.IGNORECASE)
+# Enough to find a marker split across two chunks
+HEAD_END_OVERLAP = 32
+
+youtube_regex = re.compile(
+    r".*?(?:youtube\.com\/\S*(?:(?:\/e(?:mbed))?\/|watch\?(?:\S*?&?v\=))|youtu\.be\/)([a-zA-Z0-9_-]{6,11}).*?"
+)
+
+
+async def read_head(stream: aiohttp.StreamReader, limit: int) -> bytes:
+    content = b""
+
+    # Stop reading as soon as </title> went by, the rest of the page isn't needed
+    while len(content) < limit:
+        chunk = await stream.read(min(8192, limit - len(content)))
+        if not chunk:
+            break
+        content += chunk
+        if head_end_regex.search(content, max(len(content) - len(chunk) - HEAD_END_OVERLAP, 0)):
+            break
+
+    # A tag cut off by the limit would otherwise end up in the title
+    tag_start = content.rfind(b"<")
+    if tag_start > content.rfind(b">"):
+        content = content[:tag_start]
+    return content
+
 
 # @profile
-async def get_url_data(url: str) -> tuple[bytes, str, int]:
-    async with aiohttp.ClientSession() as session:
-        resp = await asyncio.wait_for(session.get(url), 5)
+async def get_url_data(url: str, http_client: HTTPClient) -> tuple[bytes, str, int]:
+    async with http_client.Request(url) as resp:
         if resp:
             content_type: str = resp.headers.get("Content-Type", "")
             content_length_raw: str = resp.headers.get("Content-Length", "")
@@ -38,9 +68,9 @@ def get_page_metadata(*, content: bytes, content_type: str, content_length: int)
 
     if content_type and content_type.startswith("text"):
         if not content_type.startswith("text/plain"):
-            Soup = BeautifulSoup(content.decode("utf-8", errors="ignore"), "lxml")
-            if Soup.title:
-                metadata = f"[URL] {Soup.title.string}"
+            title = TitleExtractor.FromContent(content, content_type)
+            if title:
+                metadata = f"[URL] {title}"
     elif content_type and content_type.startswith("image"):
         fp = io.BytesIO(content)
         im = Image.open(fp)
@@ -55,6 +85,57 @@ def get_page_metadata(*, content: bytes, content_type: str, content_length: int)
     return metadata
 
 
+def sniff_page_metadata(*, content: bytes, content_type: str, content_length: int) -> str | None:
+    if content_type and content_type.startswith("text"):
+        return get_page_metadata(content=content, content_type=content_type, content_length=content_length)
+
+    if content_type and content_type.startswith("image"):
+        try:
+            with Image.open(io.BytesIO(content)) as im:
+                return (
+                    f"[IMAGE] {im.format} | Width: {im.size[0]} | Height: {im.size[1]}"
+                    f" | Size: {Utils.HumanSize(content_length)}"
+                )
+        except Exception:
+            # Some formats keep the dimensions further in (JPEG after its EXIF block)
+            return None
+
+    Filetype = magic.from_buffer(bytes(content))
+    if Filetype == "data":
+        return None
+    return f"[FILE] {Filetype} | Size: {Utils.HumanSize(content_length)}"
+
+
+async def sniff_url_metadata(
+    stream: aiohttp.StreamReader, content_type: str, content_length: int, limit: int, parser_pool: ParserPool
+) -> tuple[str, int]:
+    content = b""
+    window = 1024
+    eof = False
+
+    # Format headers are usually within the first kilobyte, only read more when the sniffers need it
+    while True:
+        while len(content) < window:
+            chunk = await stream.read(window - len(content))
+            if not chunk:
+                eof = True
+                break
+            content += chunk
+
+        metadata = await parser_pool.Run(
+            sniff_page_metadata, content=content, content_type=content_type, content_length=content_length
+        )
+        if metadata is None and (eof or window >= limit):
+            # Nothing more to read, the full parse reports what's wrong with it
+            metadata = await parser_pool.Run(
+                get_page_metadata, content=content, content_type=content_type, content_length=content_length
+            )
+        if metadata is not None:
+            return metadata, len(content)
+
+        window = min(window * 4, limit)
+
+
 def get_page_text(*, content: bytes, content_type: str, content_length: int) -> str:
     text = ""
 
@@ -64,22 +145,47 @@ def get_page_text(*, content: bytes, content_type: str, content_length: int) ->
     return text
 
 
-async def print_url_metadata(url: str, callback: Callable) -> None:
-    content, content_type, content_length = await get_url_data(url=url)
+async def get_url_metadata(url: str, http_client: HTTPClient, parser_pool: ParserPool) -> str:
+    async with http_client.Request(url) as resp:
+        content_type: str = resp.headers.get("Content-Type", "")
+        content_length_raw: str = resp.headers.get("Content-Length", "")
 
-    metadata = get_page_metadata(
-        content=content,
-        content_type=content_type,
-        content_length=content_length,
-    )
+        content_length = -1
+        if content_length_raw:
+            content_length = int(content_length_raw)
+
+        if content_type.startswith("text") and not content_type.startswith("text/plain"):
+            content = await asyncio.wait_for(read_head(resp.content, 65536), 5)
+            logger.debug(f"Read {len(content)} bytes of {url} for its title")
+            title = await parser_pool.Run(TitleExtractor.FromContent, content, content_type)
+            metadata = f"[URL] {title}" if title else ""
+        else:
+            metadata, read = await asyncio.wait_for(
+                sniff_url_metadata(resp.content, content_type, content_length, 65536, parser_pool), 5
+            )
+            logger.debug(f"Read {read} bytes of {url} for its metadata")
+
+        # Whatever is left of the body isn't wanted, don't hand the connection back to the pool
+        resp.close()
+    return metadata
+
+
+def normalize_url(url: str) -> str:
+    if "://" not in url:
+        url = f"http://{url}"
 
-    if len(metadata) > 0:
-        callback(metadata)
+    parsed = urlparse(url)
+    netloc = parsed.netloc.lower()
+    if (parsed.scheme == "http" and netloc.endswith(":80")) or (parsed.scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+
+    # The fragment never reaches the server
+    return parsed._replace(scheme=parsed.scheme.lower(), netloc=netloc, path=parsed.path or "/", fragment="").geturl()
 
 
 # @profile
-async def get_url_text(url: str) -> str:
-    content, content_type, content_length = await get_url_data(url=url)
+async def get_url_text(url: str, http_client: HTTPClient) -> str:
+    content, content_type, content_length = await get_url_data(url=url, http_client=http_client)
     return get_page_text(
         content=content,
         content_type=content_type,
@@ -101,8 +207,22 @@ def get_url_real_time(url: str) -> int:
     return 0
 
 
-# @profile
-def get_url_youtube_info(url: str, proxy: str = "") -> dict:
+def get_youtube_video_id(url: str) -> str | None:
+    match = youtube_regex.search(url)
+    if match:
+        return match.group(1)
+    return None
+
+
+def get_url_expire(url: str) -> int | None:
+    # Signed googlevideo stream urls carry their expiration timestamp in the query string
+    expire = parse_qs(urlparse(url).query).get("expire")
+    if expire and expire[0].isdigit():
+        return int(expire[0])
+    return None
+
+
+def get_youtube_dl(proxy: str = "") -> yt_dlp.YoutubeDL:
     # https://github.com/ytdl-org/youtube-dl/blob/3e4cedf9e8cd3157df2457df7274d0c842421945/youtube_dl/YoutubeDL.py#L137-L312
     # https://github.com/yt-dlp/yt-dlp/blob/master/yt_dlp/YoutubeDL.py#L192
     ydl_opts = {
@@ -114,30 +234,70 @@ def get_url_youtube_info(url: str, proxy: str = "") -> dict:
         "format": "m4a/bestaudio/best",
         "simulate": True,
         "keepvideo": False,
+        "socket_timeout": 10,
     }
     if proxy:
         ydl_opts["proxy"] = proxy
     ydl = yt_dlp.YoutubeDL(ydl_opts)
     ydl.add_default_info_extractors()
-    return ydl.extract_info(url, download=False)
+    return ydl
 
 
-# @profile
-def get_first_valid_entry(entries: list[Any], proxy: str = "") -> dict[str, Any]:
-    for entry in entries:
-        input_url = f"https://youtube.com/watch?v={entry['id']}"
-        try:
-            info = get_url_youtube_info(url=input_url, proxy=proxy)
-            return info
-        except yt_dlp.utils.DownloadError:
-            logger.warning(f"Error trying to download <{input_url}>")
-            pass
-    raise Exception("No compatible youtube video found, try something else")
-
-
-def get_audio_format(info: dict[str, Any]) -> str:
-    for format in info["formats"]:
-        if "audio_channels" in format:
-            logger.debug(json.dumps(format, indent=2))
-            return format["url"]
-    raise Exception("No compatible audio format found, try something else")
+# Relative cost of decoding a codec, lower is cheaper
+AUDIO_CODEC_COSTS = {
+    "mp4a": 0,
+    "aac": 0,
+    "mp3": 0,
+    "opus": 1,
+    "vorbis": 1,
+}
+
+
+def get_format_size(format: dict[str, Any]) -> int | None:
+    return format.get("filesize") or format.get("filesize_approx")
+
+
+def get_audio_format_rank(format: dict[str, Any], min_bitrate: float) -> tuple[int, int, float, int]:
+    audio_only = format.get("vcodec") == "none"
+    bitrate = format.get("abr") or format.get("tbr")
+    codec = (format.get("acodec") or "").split(".")[0]
+    codec_cost = AUDIO_CODEC_COSTS.get(codec, 2)
+
+    if bitrate is None:
+        # Unknown bitrate, only use it when there is nothing better
+        return (not audio_only, 2, 0.0, codec_cost)
+    if bitrate >= min_bitrate:
+        # Lowest bitrate which is still good enough
+        return (not audio_only, 0, bitrate, codec_cost)
+    # Nothing meets the floor, get as close to it as possible
+    return (not audio_only, 1, -bitrate, codec_cost)
+
+
+def select_audio_format(info: dict[str, Any], min_bitrate: float = 0.0) -> dict[str, Any]:
+    formats = [
+        format
+        for format in info["formats"]
+        if format.get("url")
+        and format.get("protocol", "https") in ("http", "https")
+        and ("audio_channels" in format or format.get("acodec") not in (None, "none"))
+    ]
+    if not formats:
+        raise Exception("No compatible audio format found, try something else")
+
+    return min(formats, key=lambda format: get_audio_format_rank(format, min_bitrate))
+
+
+def get_audio_format(info: dict[str, Any], min_bitrate: float = 0.0) -> str:
+    format = select_audio_format(info, min_bitrate)
+    logger.debug(json.dumps(format, indent=2))
+
+    # Compare against the first audio format, which is what used to be played
+    first_format = next((format for format in info["formats"] if "audio_channels" in format), None)
+    size = get_format_size(format)
+    if first_format is not None and size is not None and (first_size := get_format_size(first_format)):
+        logger.info(
+            f"Playing format {format.get('format_id')} ({format.get('acodec')} @ {format.get('abr')}k)"
+            f" instead of {first_format.get('format_id')}, saved {Utils.HumanSize(max(first_size - size, 0))}"
+        )
+
+    return format["url"]
@@ -0,0 +1,277 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import yt_dlp
+
+from torchlight.Cache import SingleFlight, TTLCache
+from torchlight.Config import Config
+from torchlight.HTTPClient import HTTPClient
+from torchlight.URLInfo import (
+    get_url_expire,
+    get_youtube_dl,
+    get_youtube_video_id,
+    select_audio_format,
+)
+
+logger = logging.getLogger(__name__)
+
+# Per worker process, YoutubeDL instances are expensive to build (extractor registration)
+youtube_dl_instances: dict[str, yt_dlp.YoutubeDL] = {}
+
+
+def worker_get_youtube_dl(proxy: str) -> yt_dlp.YoutubeDL:
+    if proxy not in youtube_dl_instances:
+        youtube_dl_instances[proxy] = get_youtube_dl(proxy=proxy)
+    return youtube_dl_instances[proxy]
+
+
+def worker_init(proxy: str) -> None:
+    worker_get_youtube_dl(proxy)
+
+
+def worker_extract_info(url: str, proxy: str) -> dict[str, Any]:
+    youtube_dl = worker_get_youtube_dl(proxy)
+    try:
+        info = youtube_dl.extract_info(url, download=False)
+    except yt_dlp.utils.DownloadError as exc:
+        # The original exception keeps the worker's exc_info around, which can't be pickled
+        raise yt_dlp.utils.DownloadError(str(exc)) from None
+    # Make sure the result can be pickled back to the event loop process
+    return youtube_dl.sanitize_info(info)
+
+
+def worker_ping() -> None:
+    return None
+
+
+def get_search_key(url: str) -> str | None:
+    prefix, _, query = url.partition(":")
+    if not prefix.startswith("ytsearch") or not query:
+        return None
+    return f"{prefix}:{' '.join(query.lower().split())}"
+
+
+def get_info_expire(info: dict[str, Any]) -> int | None:
+    expires = [
+        expire for format in info.get("formats", []) if (expire := get_url_expire(format.get("url", ""))) is not None
+    ]
+    return min(expires) if expires else None
+
+
+class YouTubeExtractor:
+    def __init__(self, config: Config, http_client: HTTPClient) -> None:
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = config
+        self.http_client = http_client
+        self.executor: ProcessPoolExecutor | None = None
+
+        cache_config = self.config.config.get("YouTube", {})
+        cache_size = int(cache_config.get("CacheSize", 128))
+        self.expire_margin = float(cache_config.get("ExpireMargin", 600))
+        self.info_cache: TTLCache[str, dict[str, Any]] = TTLCache(
+            max_entries=cache_size, ttl=float(cache_config.get("InfoTTL", 3600))
+        )
+        self.search_cache: TTLCache[str, dict[str, Any]] = TTLCache(
+            max_entries=cache_size, ttl=float(cache_config.get("SearchTTL", 3600))
+        )
+
+        prefetch_config = cache_config.get("Prefetch", {})
+        self.prebuffer_cache: TTLCache[str, bytes] = TTLCache(
+            max_entries=cache_size,
+            ttl=float(cache_config.get("InfoTTL", 3600)),
+            max_bytes=int(prefetch_config.get("BufferCacheBytes", 16 * 1024 * 1024)),
+            sizeof=len,
+        )
+        self.extract_flight: SingleFlight[tuple[str, str], dict[str, Any]] = SingleFlight()
+        self.prefetching: set[str] = set()
+        self.prefetch_times: deque[float] = deque()
+
+    @property
+    def workers(self) -> int:
+        return int(self.config.config.get("YouTube", {}).get("Workers", 2))
+
+    @property
+    def timeout(self) -> float:
+        return float(self.config.config.get("YouTube", {}).get("Timeout", 30.0))
+
+    @property
+    def min_bitrate(self) -> float:
+        return float(self.config.config.get("YouTube", {}).get("MinAudioBitrate", 48))
+
+    @property
+    def proxy(self) -> str:
+        return self.config["Command"].get("YouTubeSearch", {}).get("parameters", {}).get("proxy", "")
+
+    def Start(self, proxy: str | None = None) -> ProcessPoolExecutor:
+        if self.executor is not None:
+            return self.executor
+
+        if proxy is None:
+            proxy = self.proxy
+
+        self.logger.info(f"Starting {self.workers} youtube extraction workers")
+        # Don't fork the running event loop, start clean interpreters instead
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=worker_init,
+            initargs=(proxy,),
+        )
+        # Spawn every worker now so that the first request doesn't pay for the start-up
+        for _ in range(self.workers):
+            self.executor.submit(worker_ping)
+        return self.executor
+
+    def GetCachedInfo(self, url: str) -> dict[str, Any] | None:
+        search_key = get_search_key(url)
+        if search_key is not None:
+            return self.search_cache.Get(search_key)
+
+        video_id = get_youtube_video_id(url)
+        if video_id is None:
+            return None
+
+        info = self.info_cache.Get(video_id)
+        if info is None:
+            return None
+
+        # Stream urls are signed, resolve them again before they stop working
+        expire = get_info_expire(info)
+        if expire is not None and expire - time.time() < self.expire_margin:
+            self.logger.debug(f"Stream urls of {video_id} are about to expire")
+            self.info_cache.Delete(video_id)
+            return None
+
+        return info
+
+    def StoreInfo(self, url: str, info: dict[str, Any]) -> None:
+        search_key = get_search_key(url)
+        if search_key is not None:
+            self.search_cache.Set(search_key, info)
+        elif "formats" in info and "id" in info:
+            self.info_cache.Set(info["id"], info)
+
+    async def ExtractInfo(self, url: str, proxy: str = "") -> dict[str, Any]:
+        info = self.GetCachedInfo(url)
+        if info is not None:
+            return info
+
+        # A search and a pasted link for the same video resolve it only once
+        key = get_search_key(url) or get_youtube_video_id(url) or url
+        return await self.extract_flight.Do((key, proxy), lambda: self._extract_and_store(url, proxy))
+
+    async def _extract_and_store(self, url: str, proxy: str) -> dict[str, Any]:
+        info = await self._extract_info(url, proxy)
+        self.StoreInfo(url, info)
+        return info
+
+    async def _extract_info(self, url: str, proxy: str) -> dict[str, Any]:
+        executor = self.Start(proxy)
+
+        loop = asyncio.get_running_loop()
+        async with self.http_client.Limit("youtube", self.timeout):
+            # A timeout or a cancellation drops the job if it hasn't been picked up by a worker yet
+            return await asyncio.wait_for(
+                loop.run_in_executor(executor, worker_extract_info, url, proxy),
+                self.timeout,
+            )
+
+    async def GetFirstValidEntry(self, entries: list[Any], proxy: str = "") -> dict[str, Any]:
+        fan_out = int(self.config.config.get("YouTube", {}).get("SearchConcurrency", 3))
+        semaphore = asyncio.Semaphore(max(fan_out, 1))
+
+        async def resolve(input_url: str) -> dict[str, Any]:
+            async with semaphore:
+                return await self.ExtractInfo(input_url, proxy)
+
+        input_urls = [f"https://youtube.com/watch?v={entry['id']}" for entry in entries]
+        tasks = [asyncio.create_task(resolve(input_url)) for input_url in input_urls]
+        try:
+            # Resolve every candidate at once but keep the ranking of the search results
+            for input_url, task in zip(input_urls, tasks):
+                try:
+                    return await task
+                except (yt_dlp.utils.DownloadError, asyncio.TimeoutError):
+                    self.logger.warning(f"Error trying to download <{input_url}>")
+        finally:
+            for task in tasks:
+                task.cancel()
+        raise Exception("No compatible youtube video found, try something else")
+
+    def PrefetchChatLinks(self, line: str) -> None:
+        # Opt-in, chat links are only resolved ahead of a !yt, nothing else is fetched or said for them
+        if not self.config.config.get("YouTube", {}).get("Prefetch", {}).get("ChatLinks", False):
+            return
+
+        for word in line.split():
+            video_id = get_youtube_video_id(word)
+            if video_id is not None:
+                # Rebuilt from the id so that the host the player linked to is never contacted
+                self.Prefetch(f"https://www.youtube.com/watch?v={video_id}")
+
+    def Prefetch(self, url: str) -> bool:
+        prefetch_config = self.config.config.get("YouTube", {}).get("Prefetch", {})
+        if not prefetch_config.get("Enabled", True):
+            return False
+
+        video_id = get_youtube_video_id(url)
+        if video_id is None or video_id in self.prefetching or video_id in self.info_cache:
+            return False
+
+        now = time.monotonic()
+        while self.prefetch_times and now - self.prefetch_times[0] > 60.0:
+            self.prefetch_times.popleft()
+
+        if len(self.prefetch_times) >= int(prefetch_config.get("MaxPerMinute", 10)) or len(self.prefetching) >= int(
+            prefetch_config.get("Concurrency", 1)
+        ):
+            self.logger.debug(f"Prefetch budget exhausted, skipping {url}")
+            return False
+
+        self.prefetch_times.append(now)
+        self.prefetching.add(video_id)
+        asyncio.ensure_future(self._prefetch(video_id, url, float(prefetch_config.get("BufferSeconds", 0))))
+        return True
+
+    async def _prefetch(self, video_id: str, url: str, buffer_seconds: float) -> None:
+        try:
+            info = await self.ExtractInfo(url, self.proxy)
+            if "formats" not in info:
+                return
+
+            audio_format = select_audio_format(info, self.min_bitrate)
+            self.logger.info(f"Prefetched {video_id}: {info.get('title')}")
+
+            if buffer_seconds > 0 and audio_format.get("abr"):
+                # abr is in kbit/s
+                await self._prebuffer(audio_format["url"], int(buffer_seconds * audio_format["abr"] * 125))
+        except Exception as exc:
+            self.logger.debug(f"Failed to prefetch {url}: {exc}")
+        finally:
+            self.prefetching.discard(video_id)
+
+    async def _prebuffer(self, url: str, size: int) -> None:
+        async with self.http_client.Request(url, headers={"Range": f"bytes=0-{size - 1}"}) as resp:
+            # The rest of the stream is requested from where the buffer ends, which needs range support
+            if resp.status != 206:
+                return
+
+            data = await asyncio.wait_for(resp.read(), 10)
+
+        self.prebuffer_cache.Set(url, data)
+
+    def GetPrebuffer(self, url: str) -> bytes | None:
+        return self.prebuffer_cache.Get(url)
+
+    def Shutdown(self) -> None:
+        if self.executor is None:
+            return
+
+        self.logger.info("Stopping youtube extraction workers")
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = None
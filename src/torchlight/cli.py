@@ -1,8 +1,6 @@
 import asyncio
 import logging
 import signal
-import sys
-from types import FrameType
 
 import click
 
@@ -17,12 +15,13 @@ logger = logging.getLogger(__name__)
 torchlight_handler: TorchlightHandler | None = None
 
 
-def graceful_shutdown(signal: int, frame: FrameType | None) -> None:
+def graceful_shutdown(event_loop: asyncio.AbstractEventLoop) -> None:
     if torchlight_handler and torchlight_handler.audio_manager:
         logger.info("Stopping all audio sounds")
         player = PlayerManager.create_console_player()
         torchlight_handler.audio_manager.Stop(player, "")
-    sys.exit(0)
+    # The services are shut down once run_forever returned, with the loop free to finish closing them
+    event_loop.stop()
 
 
 @click.command()
@@ -38,11 +37,11 @@ def cli(config_folder: str) -> None:
         datefmt=config["Logging"]["datefmt"],
     )
 
-    signal.signal(signal.SIGINT, graceful_shutdown)
-    signal.signal(signal.SIGTERM, graceful_shutdown)
-
     event_loop = asyncio.get_event_loop()
 
+    event_loop.add_signal_handler(signal.SIGINT, graceful_shutdown, event_loop)
+    event_loop.add_signal_handler(signal.SIGTERM, graceful_shutdown, event_loop)
+
     global torchlight_handler
     torchlight_handler = TorchlightHandler(event_loop, config)
 
@@ -55,3 +54,6 @@ def cli(config_folder: str) -> None:
 
     # Run!
     event_loop.run_forever()
+
+    if torchlight_handler.torchlight:
+        torchlight_handler.torchlight.Shutdown()